@@ -0,0 +1,306 @@
+import heapq
+import time
+from array import array
+from collections import deque
+
+from snake_engine import (OPPOSITE, CELL_EMPTY, CELL_FOOD, CELL_POWERUP,
+                          CELL_OBSTACLE, CELL_SNAKE)
+
+# IA baseada em busca para as cobras controladas pelo computador.
+#
+# A cada tick: A* da cabeça até a comida, usando como heurística um campo de
+# distâncias até a comida que ignora os corpos (calculado uma vez por comida
+# e reaproveitado entre ticks); depois um flood fill confirma que a cauda
+# continua alcançável após o primeiro passo. Com o corpo longo, segue um ciclo
+# hamiltoniano pré-calculado. Todo o trabalho respeita um orçamento de tempo
+# em microssegundos; quando ele estoura, cai para a jogada mais barata.
+
+# Células onde uma cabeça pode entrar no próximo tick
+_PASSABLE = bytearray(256)
+for _tag in (CELL_EMPTY, CELL_FOOD, CELL_POWERUP):
+    _PASSABLE[_tag] = 1
+
+# Frequência (em iterações) com que os laços consultam o relógio
+_CLOCK_EVERY = 64
+
+_UNKNOWN = -1
+
+
+class SearchAI:
+    def __init__(self, time_budget_us=2000, cycle_ratio=0.5):
+        self.time_budget_us = time_budget_us
+        # Fração do tabuleiro a partir da qual o ciclo hamiltoniano é preferido
+        self.cycle_ratio = cycle_ratio
+        self.timeouts = 0
+        self.moves = 0
+        self._late = False
+        self._field_key = None
+        self._field = None
+        self._field_queue = None
+        self._cycle_key = None
+        self._cycle = None
+
+    def __call__(self, engine, body, own_tag):
+        self.moves += 1
+        self._late = False
+        direction = self._choose(engine, body, own_tag)
+        if self._late:
+            self.timeouts += 1
+        return direction
+
+    def _choose(self, engine, body, own_tag):
+        deadline = time.perf_counter_ns() + self.time_budget_us * 1000
+        head = body[0]
+        moves = self._open_moves(engine, head)
+        if own_tag == CELL_SNAKE:
+            # O motor ignora a inversão de sentido da cobra do jogador
+            moves = [move for move in moves if move[0] != OPPOSITE[engine.direction]]
+        if not moves:
+            # Sem saída: qualquer direção serve
+            return "UP"
+        if len(moves) == 1:
+            return moves[0][0]
+
+        field = self._distance_field(engine, deadline)
+
+        # Corpo longo: o ciclo hamiltoniano nunca se prende
+        if len(body) >= self.cycle_ratio * engine.free_cells():
+            move = self._cycle_move(engine, head, moves)
+            if move is not None:
+                return move
+
+        target = self._astar(engine, head, field, deadline)
+        if target is not None:
+            for direction, cell in moves:
+                if cell == target and self._tail_reachable(engine, body, cell, deadline):
+                    return direction
+
+        return self._survival_move(engine, body, moves, field, deadline)
+
+    def policy(self, engine):
+        # Permite usar a IA como política do jogador em run_many()
+        return self(engine, engine.snake, CELL_SNAKE)
+
+    def _open_moves(self, engine, head):
+        moves = []
+        for direction, table in engine.moves.items():
+            cell = table[head]
+            if cell >= 0 and _PASSABLE[engine.grid[cell]]:
+                moves.append((direction, cell))
+        return moves
+
+    def _expired(self, deadline):
+        if time.perf_counter_ns() > deadline:
+            self._late = True
+            return True
+        return False
+
+    def _distance_field(self, engine, deadline):
+        # BFS a partir da comida ignorando os corpos; só obstáculos e bordas
+        # bloqueiam. Se o orçamento acabar, a busca continua no próximo tick.
+        key = (engine.generation, engine.food)
+        if key != self._field_key:
+            self._field_key = key
+            self._field = array("i", [_UNKNOWN]) * (engine.width * engine.height)
+            self._field_queue = deque()
+            if engine.food is not None:
+                self._field[engine.food] = 0
+                self._field_queue.append(engine.food)
+
+        field = self._field
+        queue = self._field_queue
+        grid = engine.grid
+        tables = engine.moves.values()
+        steps = 0
+        while queue:
+            steps += 1
+            if steps % _CLOCK_EVERY == 0 and self._expired(deadline):
+                break
+            cell = queue.popleft()
+            dist = field[cell] + 1
+            for table in tables:
+                nxt = table[cell]
+                if nxt >= 0 and field[nxt] == _UNKNOWN and grid[nxt] != CELL_OBSTACLE:
+                    field[nxt] = dist
+                    queue.append(nxt)
+        return field
+
+    def _heuristic(self, engine, field, cell):
+        dist = field[cell]
+        if dist != _UNKNOWN:
+            return dist
+        row, col = engine.to_cell(cell)
+        food_row, food_col = engine.to_cell(engine.food)
+        return abs(row - food_row) + abs(col - food_col)
+
+    def _astar(self, engine, head, field, deadline):
+        # Devolve a primeira célula do caminho mais curto até a comida
+        if engine.food is None:
+            return None
+        grid = engine.grid
+        tables = engine.moves.values()
+        came_from = {head: None}
+        cost = {head: 0}
+        # Empates em f são decididos pela menor distância restante (h): com a
+        # heurística quase exata, todas as células de algum caminho mínimo
+        # empatam, e desempatar por g exploraria o retângulo inteiro entre a
+        # cabeça e a comida
+        h = self._heuristic(engine, field, head)
+        frontier = [(h, h, 0, head)]
+        steps = 0
+        while frontier:
+            steps += 1
+            if steps % _CLOCK_EVERY == 0 and self._expired(deadline):
+                return None
+            _, _, g, cell = heapq.heappop(frontier)
+            if cell == engine.food:
+                while came_from[cell] != head:
+                    cell = came_from[cell]
+                return cell
+            if g > cost[cell]:
+                continue
+            for table in tables:
+                nxt = table[cell]
+                if nxt < 0 or not _PASSABLE[grid[nxt]]:
+                    continue
+                if nxt not in cost or g + 1 < cost[nxt]:
+                    cost[nxt] = g + 1
+                    came_from[nxt] = cell
+                    h = self._heuristic(engine, field, nxt)
+                    heapq.heappush(frontier, (g + 1 + h, h, g + 1, nxt))
+        return None
+
+    def _flood(self, engine, start, limit, tail, deadline):
+        # Conta células alcançáveis a partir de start (até limit) e diz se a
+        # cauda é vizinha da região, ou seja, se ainda há saída
+        grid = engine.grid
+        tables = engine.moves.values()
+        seen = {start}
+        queue = deque([start])
+        touches_tail = False
+        steps = 0
+        while queue and len(seen) < limit:
+            steps += 1
+            if steps % _CLOCK_EVERY == 0 and self._expired(deadline):
+                break
+            cell = queue.popleft()
+            for table in tables:
+                nxt = table[cell]
+                if nxt < 0 or nxt in seen:
+                    continue
+                if nxt == tail:
+                    touches_tail = True
+                if _PASSABLE[grid[nxt]]:
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return len(seen), touches_tail
+
+    def _tail_reachable(self, engine, body, cell, deadline):
+        size, touches_tail = self._flood(engine, cell, len(body) + 1, body[-1], deadline)
+        return touches_tail or size > len(body)
+
+    def _survival_move(self, engine, body, moves, field, deadline):
+        # Prefere a maior região livre; empate decidido pela distância à comida
+        best = None
+        for direction, cell in moves:
+            size, touches_tail = self._flood(engine, cell, len(body) + 1, body[-1], deadline)
+            dist = field[cell] if field[cell] != _UNKNOWN else engine.width * engine.height
+            score = (touches_tail or size > len(body), size, -dist)
+            if best is None or score > best[0]:
+                best = (score, direction)
+        return best[1]
+
+    def _cycle_move(self, engine, head, moves):
+        cycle = self._hamiltonian_cycle(engine)
+        if cycle is None:
+            return None
+        target = cycle[head]
+        for direction, cell in moves:
+            if cell == target:
+                return direction
+        return None
+
+    def _hamiltonian_cycle(self, engine):
+        # cycle[célula] = próxima célula do ciclo; None se altura e largura
+        # forem ímpares (não existe ciclo) ou se houver obstáculos ou portais
+        key = (engine.width, engine.height, engine.generation)
+        if key == self._cycle_key:
+            return self._cycle
+        self._cycle_key = key
+        self._cycle = None
+        width, height = engine.width, engine.height
+        if engine.obstacles or engine.portals or width < 2 or height < 2:
+            return None
+        if height % 2 == 0:
+            order = _serpentine(width, height, lambda row, col: row * width + col)
+        elif width % 2 == 0:
+            order = _serpentine(height, width, lambda col, row: row * width + col)
+        else:
+            return None
+        cycle = array("i", [0]) * (width * height)
+        for i, cell in enumerate(order):
+            cycle[cell] = order[(i + 1) % len(order)]
+        self._cycle = cycle
+        return cycle
+
+
+def _serpentine(width, height, index):
+    # Percorre as linhas em zigue-zague pelas colunas 1..largura-1 e volta
+    # pela coluna 0; exige altura par
+    order = []
+    for row in range(height):
+        cols = range(1, width) if row % 2 == 0 else range(width - 1, 0, -1)
+        for col in cols:
+            order.append(index(row, col))
+    for row in range(height - 1, -1, -1):
+        order.append(index(row, 0))
+    return order
+
+
+def benchmark(lengths=(10, 50, 200, 500, 1000), width=40, height=30, samples=200):
+    # Latência de get_ai_move com cobras sintéticas de tamanhos crescentes
+    from snake_engine import SnakeEngine, greedy_ai
+
+    results = []
+    for length in lengths:
+        engine = SnakeEngine(width, height, seed=length)
+        if length >= engine.free_cells():
+            continue
+        body = _synthetic_body(engine, length)
+        for name, ai in (("greedy", greedy_ai), ("search", SearchAI())):
+            timings = []
+            for _ in range(samples):
+                start = time.perf_counter_ns()
+                ai(engine, body, CELL_SNAKE)
+                timings.append((time.perf_counter_ns() - start) / 1000)
+            timings.sort()
+            results.append({
+                "ai": name,
+                "length": length,
+                "mean_us": sum(timings) / len(timings),
+                "p99_us": timings[int(len(timings) * 0.99) - 1]
+            })
+    return results
+
+
+def _synthetic_body(engine, length):
+    # Substitui a cobra do jogador por uma em zigue-zague com o tamanho pedido
+    for cell in engine.snake:
+        engine.set_cell(cell, CELL_EMPTY)
+    engine.snake.clear()
+    order = _serpentine(engine.width, engine.height, lambda row, col: row * engine.width + col)
+    for cell in order[:length]:
+        if cell == engine.food:
+            engine.food = None
+        engine.snake.appendleft(cell)
+        engine.set_cell(cell, CELL_SNAKE)
+    if engine.food is None:
+        engine.food = engine.generate_food()
+        engine.set_cell(engine.food, CELL_FOOD)
+    return engine.snake
+
+
+if __name__ == "__main__":
+    print(f"{'IA':<8} {'tamanho':>8} {'média (µs)':>12} {'p99 (µs)':>10}")
+    for row in benchmark():
+        print(f"{row['ai']:<8} {row['length']:>8} {row['mean_us']:>12.1f} {row['p99_us']:>10.1f}")
@@ -0,0 +1,304 @@
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+
+from snake_engine import (SnakeEngine, DIRECTIONS, CELL_EMPTY, CELL_SNAKE, CELL_OBSTACLE,
+                          CELL_FOOD, MODE_OBSTACLE_DENSITY, greedy_ai, greedy_policy,
+                          obstacle_layout)
+from snake_ai import SearchAI, _serpentine
+
+# Benchmarks reproduzíveis de simulação, IA e desenho. Cada caso monta um
+# tabuleiro sintético com semente fixa: a cobra do jogador em zigue-zague com
+# o tamanho pedido e obstáculos sorteados nas células livres. Os tempos saem
+# em microssegundos (média, p50 e p99) e podem ser gravados em JSON e
+# comparados com uma execução anterior.
+#
+# O desenho roda sem janela (driver "dummy" do SDL) e é pulado com --no-render.
+
+DEFAULT_LENGTHS = (10, 100, 500, 1000, 2000, 4000)
+FILL_RATIOS = (0.1, 0.5, 0.9, 0.99)
+# Cobras da arena nos casos tick[arena], num tabuleiro de 200x150
+ARENA_SNAKES = (50, 200, 500)
+# Layouts de obstáculos de 1000x1000 gerados no caso obstacle_layout (cada um
+# leva uma fração de segundo)
+LAYOUT_SAMPLES = 5
+# Jogadas da SearchAI antes de medir o caso "quente": o campo de distâncias
+# até a comida é montado aos poucos ao longo dos primeiros ticks
+AI_WARMUP = 100
+
+
+def synthetic_engine(length, width=100, height=80, obstacles=50, seed=0):
+    # Tabuleiro com a cabeça no fim do zigue-zague, olhando para uma célula livre
+    engine = SnakeEngine(width, height, seed=seed)
+    for cell in engine.snake:
+        engine.set_cell(cell, CELL_EMPTY)
+    engine.snake.clear()
+    if engine.food is not None:
+        engine.set_cell(engine.food, CELL_EMPTY)
+    order = _serpentine(width, height, lambda row, col: row * width + col)
+    for cell in order[:length]:
+        engine.snake.appendleft(cell)
+        engine.set_cell(cell, CELL_SNAKE)
+    # A próxima célula do zigue-zague fica reservada para o primeiro passo
+    ahead = order[length]
+    engine.set_cell(ahead, CELL_FOOD)
+    for _ in range(obstacles):
+        cell = engine.generate_food()
+        if cell is None:
+            break
+        engine.set_cell(cell, CELL_OBSTACLE)
+        engine.obstacles.append(cell)
+    engine.set_cell(ahead, CELL_EMPTY)
+    engine.food = engine.generate_food()
+    if engine.food is not None:
+        engine.set_cell(engine.food, CELL_FOOD)
+    for direction in DIRECTIONS:
+        if engine.neighbour(engine.snake[0], direction) == ahead:
+            engine.direction = direction
+    return engine
+
+
+def filled_engine(ratio, width=100, height=80, seed=0):
+    # Tabuleiro com a fração pedida das células livres ocupada por obstáculos
+    engine = SnakeEngine(width, height, seed=seed)
+    for _ in range(int(engine.free_cells() * ratio)):
+        cell = engine.generate_food()
+        engine.set_cell(cell, CELL_OBSTACLE)
+        engine.obstacles.append(cell)
+    return engine
+
+
+def measure(fn, samples, number=1, setup=None):
+    # Tempo de fn em µs por chamada; setup() roda fora da medição e seu
+    # resultado é passado para fn
+    timings = []
+    for _ in range(samples):
+        arg = setup() if setup else None
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn(arg)
+        timings.append((time.perf_counter_ns() - start) / 1000 / number)
+    timings.sort()
+    return {
+        "mean_us": sum(timings) / len(timings),
+        "p50_us": timings[len(timings) // 2],
+        "p99_us": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        "samples": samples
+    }
+
+
+def bench_simulation(lengths, samples, width, height, obstacles):
+    results = []
+    for length in lengths:
+        base = synthetic_engine(length, width, height, obstacles)
+        stats = measure(lambda engine: engine.step(), samples, setup=base.clone)
+        results.append({"name": "tick", "length": length, **stats})
+        stats = measure(lambda _: base.clone(), samples, number=10)
+        results.append({"name": "clone", "length": length, **stats})
+    for snakes in ARENA_SNAKES:
+        # Alguns ticks para as cobras crescerem, parando num estado em que o
+        # tick medido não mata o jogador (com o jogo acabado, step() não faz nada)
+        states = [SnakeEngine(200, 150, seed=0, mode="arena", ai_count=snakes)]
+        for _ in range(20):
+            after = states[-1].clone()
+            after.step(greedy_policy(after))
+            if after.game_over:
+                if len(states) > 1:
+                    states.pop()
+                break
+            states.append(after)
+        base = states[-1]
+        stats = measure(lambda engine: engine.step(greedy_policy(engine)), samples, setup=base.clone)
+        results.append({"name": "tick[arena]", "snakes": snakes, **stats})
+    for ratio in FILL_RATIOS:
+        engine = filled_engine(ratio, width, height)
+        stats = measure(lambda _: engine.generate_food(), samples, number=100)
+        results.append({"name": "generate_food", "fill": ratio, **stats})
+    # Layout do modo obstáculos num tabuleiro de 1000x1000: semente nova a cada
+    # amostra e, depois, a mesma semente saindo do cache
+    density = MODE_OBSTACLE_DENSITY["obstacles"]
+    seeds = itertools.count()
+    stats = measure(lambda seed: obstacle_layout(1000, 1000, density, seed), LAYOUT_SAMPLES,
+                    setup=lambda: next(seeds))
+    results.append({"name": "obstacle_layout[1000x1000]", **stats})
+    stats = measure(lambda _: obstacle_layout(1000, 1000, density, 0), samples)
+    results.append({"name": "obstacle_layout[cache]", **stats})
+    return results
+
+
+def bench_ai(lengths, samples, width, height, obstacles):
+    results = []
+    for length in lengths:
+        engine = synthetic_engine(length, width, height, obstacles)
+        search = SearchAI()
+        for _ in range(AI_WARMUP):
+            search(engine, engine.snake, CELL_SNAKE)
+        for name, ai in (("greedy", greedy_ai), ("search", search)):
+            stats = measure(lambda _: ai(engine, engine.snake, CELL_SNAKE), samples)
+            results.append({"name": f"get_ai_move[{name}]", "length": length, **stats})
+        # Primeira jogada depois de uma comida nova, sem nenhum cache
+        stats = measure(lambda ai: ai(engine, engine.snake, CELL_SNAKE), samples, setup=SearchAI)
+        results.append({"name": "get_ai_move[search,cold]", "length": length, **stats})
+    return results
+
+
+def bench_render(lengths, samples, width, height, obstacles):
+    from snake_gui import SnakeGame
+
+    game = SnakeGame(headless=True)
+    results = []
+    for length in lengths:
+        game.engine = synthetic_engine(length, width, height, obstacles)
+        game.renderer.invalidate()
+        game.renderer.render()
+        engine = game.engine
+        head = engine.snake[0]
+        neck = engine.snake[1]
+        tail = engine.snake[-1]
+        row, col = engine.to_cell(head)
+        cases = {
+            "draw_grid": lambda _: game.draw_grid(game.screen),
+            "draw_visible": lambda _: game.draw_visible(),
+            "draw_cell": lambda _: game.draw_cell(neck),
+            "draw_head": lambda _: game.draw_head(row, col),
+            "draw_sliding_head": lambda _: game.draw_sliding_head(CELL_SNAKE, head, neck, 0.5),
+            "draw_shrinking_tail": lambda _: game.draw_shrinking_tail(CELL_SNAKE, tail, engine.snake[-2], 0.5),
+            "draw_score": lambda _: game.draw_score(),
+        }
+        for name, fn in cases.items():
+            results.append({"name": name, "length": length, **measure(fn, samples)})
+        # Modo colorido: cada segmento com o tom do gradiente
+        engine.mode = "colorful"
+        results.append({"name": "draw_visible[colorful]", "length": length,
+                        **measure(lambda _: game.draw_visible(), samples)})
+        engine.mode = "classic"
+
+        def full_frame(_):
+            game.renderer.full_redraw = True
+            game.renderer.render()
+        results.append({"name": "frame[full]", "length": length, **measure(full_frame, samples)})
+
+        # Quadro incremental: um tick do motor e o desenho só do que mudou
+        base = engine.clone()
+
+        def setup():
+            game.engine = base.clone()
+            game.camera.center(game.engine)
+            game.renderer.full_redraw = False
+            game.renderer.motions = {}
+            return game.engine.step()
+
+        def incremental_frame(events):
+            game.renderer.apply(events)
+            game.renderer.render()
+        results.append({"name": "frame[tick]", "length": length,
+                        **measure(incremental_frame, samples, setup=setup)})
+    return results
+
+
+def run_benchmarks(lengths=DEFAULT_LENGTHS, samples=200, width=100, height=80, obstacles=50,
+                   render=True):
+    # A cobra, os obstáculos e a célula à frente da cabeça precisam caber
+    lengths = [length for length in lengths if length + obstacles + 2 < width * height]
+    results = bench_simulation(lengths, samples, width, height, obstacles)
+    results += bench_ai(lengths, samples, width, height, obstacles)
+    if render:
+        results += bench_render(lengths, samples, width, height, obstacles)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "width": width,
+            "height": height,
+            "obstacles": obstacles,
+            "samples": samples
+        },
+        "results": results
+    }
+
+
+def _key(result):
+    # Identifica o mesmo caso em duas execuções
+    return result["name"], result.get("length"), result.get("fill"), result.get("snakes")
+
+
+def _label(result):
+    name, length, fill, snakes = _key(result)
+    if length is not None:
+        return f"{name} n={length}"
+    if fill is not None:
+        return f"{name} {fill:.0%}"
+    if snakes is not None:
+        return f"{name} {snakes} cobras"
+    return name
+
+
+def compare(report, baseline, threshold=0.10, min_delta_us=1.0):
+    # Compara p50 com a execução de referência; devolve os casos que pioraram
+    # mais que threshold e mais que min_delta_us (casos de menos de 1 µs
+    # variam bastante de uma execução para outra)
+    old = {_key(result): result for result in baseline["results"]}
+    print(f"{'caso':<36} {'antes (µs)':>11} {'agora (µs)':>11} {'razão':>7}")
+    regressions = []
+    for result in report["results"]:
+        before = old.get(_key(result))
+        if before is None:
+            print(f"{_label(result):<36} {'-':>11} {result['p50_us']:>11.2f} {'novo':>7}")
+            continue
+        ratio = result["p50_us"] / before["p50_us"] if before["p50_us"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold and result["p50_us"] - before["p50_us"] > min_delta_us:
+            regressions.append(result)
+            flag = "  <- pior"
+        print(f"{_label(result):<36} {before['p50_us']:>11.2f} {result['p50_us']:>11.2f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def print_report(report):
+    print(f"{'caso':<36} {'média (µs)':>11} {'p50 (µs)':>10} {'p99 (µs)':>10}")
+    for result in report["results"]:
+        print(f"{_label(result):<36} {result['mean_us']:>11.2f} {result['p50_us']:>10.2f} "
+              f"{result['p99_us']:>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="snake_bench.py",
+                                     description="Benchmarks de simulação, IA e desenho")
+    parser.add_argument("--lengths", default=",".join(map(str, DEFAULT_LENGTHS)),
+                        help="tamanhos da cobra, separados por vírgula")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=80)
+    parser.add_argument("--obstacles", type=int, default=50)
+    parser.add_argument("--no-render", action="store_true", help="pula os casos de desenho")
+    parser.add_argument("--out", help="grava os resultados em JSON")
+    parser.add_argument("--compare", metavar="JSON", help="compara com uma execução gravada")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="piora relativa do p50 que conta como regressão")
+    parser.add_argument("--min-delta", type=float, default=1.0,
+                        help="piora mínima do p50, em µs, para contar como regressão")
+    args = parser.parse_args(argv)
+
+    lengths = [int(length) for length in args.lengths.split(",") if length]
+    report = run_benchmarks(lengths, args.samples, args.width, args.height, args.obstacles,
+                            render=not args.no_render)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"{len(regressions)} caso(s) mais lentos que a referência")
+            return 1
+        return 0
+    print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
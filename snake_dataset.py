@@ -0,0 +1,277 @@
+import argparse
+import bisect
+import json
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from snake_engine import SnakeEngine, DIRECTIONS, CELL_SNAKE, GRID_WIDTH, GRID_HEIGHT
+from snake_tournament import POLICIES
+
+# Dataset de partidas sem janela para treinar políticas: cada passo é uma
+# tupla (observação, ação, recompensa, fim). A observação é a grade de
+# ocupação do SnakeEngine antes do tick (altura x largura, com as marcas
+# CELL_*: cobra, IA, comida, obstáculos...), a ação é o índice em DIRECTIONS
+# da direção que a cobra tomou, a recompensa é o que a pontuação subiu e fim
+# marca o último passo da partida (morte ou max_ticks).
+#
+# Os passos vão para shards de tamanho fixo, um arquivo .npy por campo,
+# escritos direto em memmaps: nada além de um shard fica na memória. Com
+# compressão, o shard é montado em memória e salvo num .npz. O manifesto
+# (dataset.json) é regravado a cada shard fechado e só lista shards fechados;
+# o último, fechado por close(), pode ter menos passos.
+
+MANIFEST = "dataset.json"
+VERSION = 1
+
+FIELDS = ("obs", "action", "reward", "done")
+ACTIONS = list(DIRECTIONS)
+
+# Tamanho de um shard quando não informado: tantos passos quanto couberem
+SHARD_BYTES = 64 * 1024 * 1024
+
+# Shards abertos mantidos pelo leitor (os comprimidos são descomprimidos)
+SHARD_CACHE = 4
+
+
+def _dtypes(width, height):
+    return {
+        "obs": (np.uint8, (height, width)),
+        "action": (np.int8, ()),
+        "reward": (np.int32, ()),
+        "done": (np.bool_, ()),
+    }
+
+
+class ShardWriter:
+    def __init__(self, path, width=GRID_WIDTH, height=GRID_HEIGHT, shard_size=None,
+                 compress=False, meta=None):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.shard_size = shard_size or max(1, SHARD_BYTES // (width * height))
+        self.compress = compress
+        self.meta = dict(meta or {})
+        self.shards = []
+        self.steps = 0
+        self._arrays = None
+        self._count = 0
+        os.makedirs(path, exist_ok=True)
+
+    def _open_shard(self):
+        name = f"shard-{len(self.shards):05d}"
+        self._arrays = {}
+        for field, (dtype, shape) in _dtypes(self.width, self.height).items():
+            shape = (self.shard_size,) + shape
+            if self.compress:
+                self._arrays[field] = np.zeros(shape, dtype=dtype)
+            else:
+                self._arrays[field] = np.lib.format.open_memmap(
+                    os.path.join(self.path, f"{name}-{field}.npy"), mode="w+", dtype=dtype, shape=shape)
+        # A grade chega como bytes; a observação é escrita pela visão plana
+        self._obs = self._arrays["obs"].reshape(self.shard_size, -1)
+        self._count = 0
+
+    def add(self, obs, action, reward, done):
+        # obs: grade de altura x largura bytes (bytearray do engine ou array)
+        if self._arrays is None:
+            self._open_shard()
+        i = self._count
+        self._obs[i] = np.frombuffer(obs, dtype=np.uint8)
+        arrays = self._arrays
+        arrays["action"][i] = action
+        arrays["reward"][i] = reward
+        arrays["done"][i] = done
+        self._count += 1
+        if self._count == self.shard_size:
+            self._close_shard()
+
+    def _close_shard(self):
+        name = f"shard-{len(self.shards):05d}"
+        count = self._count
+        if self.compress:
+            np.savez_compressed(os.path.join(self.path, name + ".npz"),
+                                **{field: array[:count] for field, array in self._arrays.items()})
+        elif count < self.shard_size:
+            # Último shard incompleto: regravado só com os passos escritos
+            partial = {field: np.array(array[:count]) for field, array in self._arrays.items()}
+            self._arrays = self._obs = None
+            for field, array in partial.items():
+                np.save(os.path.join(self.path, f"{name}-{field}.npy"), array)
+        else:
+            for array in self._arrays.values():
+                array.flush()
+        self._arrays = self._obs = None
+        self.shards.append({"name": name, "steps": count})
+        self.steps += count
+        self.write_manifest()
+
+    def write_manifest(self):
+        manifest = {
+            "version": VERSION,
+            "width": self.width,
+            "height": self.height,
+            "shard_size": self.shard_size,
+            "compressed": self.compress,
+            "steps": self.steps,
+            "shards": self.shards,
+            "meta": self.meta,
+        }
+        tmp_path = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST))
+
+    def close(self):
+        # O último shard pode ficar incompleto; o manifesto guarda quantos passos ele tem
+        if self._arrays is not None and self._count:
+            self._close_shard()
+        elif not self.shards:
+            self.write_manifest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShardReader:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != VERSION:
+            raise ValueError(f"versão de dataset não suportada: {self.manifest.get('version')}")
+        self.width = self.manifest["width"]
+        self.height = self.manifest["height"]
+        self.compressed = self.manifest["compressed"]
+        self.shards = self.manifest["shards"]
+        # Primeiro passo global de cada shard, para achar o shard de um índice
+        self.starts = []
+        total = 0
+        for shard in self.shards:
+            self.starts.append(total)
+            total += shard["steps"]
+        self.steps = total
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return self.steps
+
+    def shard(self, index):
+        # Campos do shard como arrays (memmaps somente leitura, sem cópia)
+        arrays = self._cache.get(index)
+        if arrays is not None:
+            self._cache.move_to_end(index)
+            return arrays
+        shard = self.shards[index]
+        base = os.path.join(self.path, shard["name"])
+        count = shard["steps"]
+        if self.compressed:
+            with np.load(base + ".npz") as data:
+                arrays = {field: data[field] for field in FIELDS}
+        else:
+            arrays = {field: np.load(f"{base}-{field}.npy", mmap_mode="r")[:count] for field in FIELDS}
+        self._cache[index] = arrays
+        if len(self._cache) > SHARD_CACHE:
+            self._cache.popitem(last=False)
+        return arrays
+
+    def __getitem__(self, step):
+        # Acesso aleatório a um passo: (obs, ação, recompensa, fim)
+        if step < 0:
+            step += self.steps
+        if not 0 <= step < self.steps:
+            raise IndexError(step)
+        index = bisect.bisect_right(self.starts, step) - 1
+        arrays = self.shard(index)
+        i = step - self.starts[index]
+        return arrays["obs"][i], int(arrays["action"][i]), int(arrays["reward"][i]), bool(arrays["done"][i])
+
+    def iter_steps(self):
+        for index in range(len(self.shards)):
+            arrays = self.shard(index)
+            yield from zip(arrays["obs"], arrays["action"], arrays["reward"], arrays["done"])
+
+    def batches(self, batch_size, shuffle=False, seed=None):
+        # Lotes {campo: array} que não atravessam shards. Em ordem, cada lote é
+        # uma fatia do memmap (sem cópia); embaralhado, a ordem dos shards e a
+        # dos passos dentro de cada um são sorteadas e o lote é copiado.
+        rng = np.random.default_rng(seed)
+        order = np.arange(len(self.shards))
+        if shuffle:
+            rng.shuffle(order)
+        for index in order:
+            arrays = self.shard(index)
+            count = self.shards[index]["steps"]
+            steps = rng.permutation(count) if shuffle else None
+            for start in range(0, count, batch_size):
+                if steps is None:
+                    yield {field: array[start:start + batch_size] for field, array in arrays.items()}
+                else:
+                    picked = np.sort(steps[start:start + batch_size])
+                    yield {field: array[picked] for field, array in arrays.items()}
+
+
+def export_games(path, seeds, policy="search", opponent=None, mode=None, max_ticks=5000,
+                 width=GRID_WIDTH, height=GRID_HEIGHT, shard_size=None, compress=False):
+    # Joga uma partida por semente com a política do jogador e grava cada tick
+    mode = mode or ("ai" if opponent else "classic")
+    player_ai = POLICIES[policy]()
+    opponent_ai = POLICIES[opponent]() if opponent else None
+    meta = {"policy": policy, "opponent": opponent, "mode": mode, "max_ticks": max_ticks,
+            "seeds": [seeds[0], seeds[-1]] if seeds else []}
+    engine = SnakeEngine(width, height, mode=mode, ai=opponent_ai)
+    action_index = {direction: i for i, direction in enumerate(ACTIONS)}
+    with ShardWriter(path, width, height, shard_size, compress, meta) as writer:
+        for seed in seeds:
+            engine.reset(seed)
+            while not engine.game_over and engine.ticks < max_ticks:
+                obs = bytes(engine.grid)
+                score = engine.score
+                engine.step(player_ai(engine, engine.snake, CELL_SNAKE))
+                done = engine.game_over or engine.ticks >= max_ticks
+                writer.add(obs, action_index[engine.direction], engine.score - score, done)
+    return writer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="snake_dataset.py",
+                                     description="Exporta partidas sem janela como dataset de treino")
+    parser.add_argument("path", help="diretório do dataset")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--policy", default="search", choices=list(POLICIES))
+    parser.add_argument("--opponent", default=None, choices=list(POLICIES), help="IA adversária")
+    parser.add_argument("--mode", default=None, help="modo do SnakeEngine (padrão: classic ou ai)")
+    parser.add_argument("--max-ticks", type=int, default=5000)
+    parser.add_argument("--width", type=int, default=GRID_WIDTH)
+    parser.add_argument("--height", type=int, default=GRID_HEIGHT)
+    parser.add_argument("--seed", type=int, default=0, help="primeira semente")
+    parser.add_argument("--shard-size", type=int, default=None, help="passos por shard")
+    parser.add_argument("--compress", action="store_true", help="shards .npz comprimidos")
+    parser.add_argument("--info", action="store_true", help="só mostra o dataset existente")
+    args = parser.parse_args(argv)
+
+    if not args.info:
+        start = time.perf_counter()
+        writer = export_games(args.path, list(range(args.seed, args.seed + args.games)), args.policy,
+                              args.opponent, args.mode, args.max_ticks, args.width, args.height,
+                              args.shard_size, args.compress)
+        elapsed = time.perf_counter() - start
+        print(f"{writer.steps} passos de {args.games} jogos em {elapsed:.1f}s "
+              f"({writer.steps / max(elapsed, 1e-9):.0f} passos/s)")
+
+    reader = ShardReader(args.path)
+    start = time.perf_counter()
+    done = sum(int(batch["done"].sum()) for batch in reader.batches(4096))
+    elapsed = time.perf_counter() - start
+    print(f"{len(reader)} passos em {len(reader.shards)} shards "
+          f"({'comprimidos' if reader.compressed else 'memmap'}), {done} partidas, "
+          f"{reader.width}x{reader.height}; leitura em {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
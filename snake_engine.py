@@ -0,0 +1,1063 @@
+import heapq
+import itertools
+import json
+import random
+import zlib
+from array import array
+from collections import OrderedDict, deque
+
+# Motor de simulação do jogo, sem dependência de pygame nem de janela.
+# O SnakeGame (snake_gui.py) apenas desenha e repassa as teclas para cá.
+#
+# As células do tabuleiro são índices compactados (linha * largura + coluna).
+# O conteúdo de cada célula fica numa grade de ocupação (bytearray), então
+# toda verificação de colisão é uma leitura O(1), independente do tamanho
+# das cobras.
+#
+# As células livres onde comida e power-ups podem nascer (todas menos a borda)
+# ficam num array com remoção por troca com o último elemento, mais um índice
+# de posição por célula. Sortear uma célula livre é O(1) mesmo com o
+# tabuleiro quase cheio.
+#
+# clone() copia só os corpos das cobras; a grade, o índice de células livres
+# e o RNG ficam compartilhados até a primeira escrita de qualquer uma das
+# cópias (copy-on-write), então simular jogadas à frente numa cópia custa
+# microssegundos mesmo em tabuleiros grandes. to_bytes()/from_bytes() gravam
+# e restauram o estado inteiro, RNG incluído.
+#
+# Para onde leva cada passo vem de tabelas pré-calculadas por topologia
+# (engine.moves[direção][célula], -1 se bater na parede): com bordas, com
+# bordas que dão a volta (toro) ou com portais. Movimento, colisões e a IA
+# resolvem um passo com uma consulta, sem contas de linha e coluna.
+#
+# No modo obstáculos, obstacle_layout() espalha trechos de parede e só aceita
+# cada célula se as vizinhas livres continuarem ligadas em volta dela, então
+# nenhuma célula livre fica isolada do ponto de partida.
+#
+# Tudo o que vence num tick futuro (power-ups que somem, efeitos que acabam)
+# fica num heap ordenado pelo tick: cada step() só olha o topo, então o custo
+# cresce com o que vence no tick, não com o que está ativo.
+
+GRID_WIDTH = 40
+GRID_HEIGHT = 30
+
+DIRECTIONS = {
+    "UP": (-1, 0),
+    "DOWN": (1, 0),
+    "LEFT": (0, -1),
+    "RIGHT": (0, 1)
+}
+
+OPPOSITE = {
+    "UP": "DOWN",
+    "DOWN": "UP",
+    "LEFT": "RIGHT",
+    "RIGHT": "LEFT"
+}
+
+# Conteúdo das células na grade de ocupação
+CELL_EMPTY = 0
+CELL_SNAKE = 1
+CELL_AI = 2
+CELL_OBSTACLE = 3
+CELL_POWERUP = 4
+CELL_FOOD = 5
+CELL_PORTAL = 6
+
+# Eventos devolvidos por SnakeEngine.step(), sempre no formato (evento, dado).
+# As posições são índices compactados; use engine.to_cell() para (linha, coluna).
+EVENT_MOVE = "move"            # cabeça da cobra avançou para a célula
+EVENT_TAIL = "tail"            # cauda da cobra deixou a célula
+EVENT_EAT = "eat"              # cobra comeu a comida na célula
+EVENT_FOOD = "food"            # nova comida na célula
+EVENT_POWERUP = "powerup"      # novo power-up na célula
+EVENT_AI_MOVE = "ai_move"
+EVENT_AI_TAIL = "ai_tail"
+EVENT_AI_EAT = "ai_eat"
+EVENT_GAME_OVER = "game_over"  # motivo: "wall", "self", "obstacle", "ai" ou "board_full"
+# Eventos das cobras da arena; o dado é (cobra, célula) ou (cobra, células)
+EVENT_ARENA_MOVE = "arena_move"
+EVENT_ARENA_TAIL = "arena_tail"
+EVENT_ARENA_EAT = "arena_eat"
+EVENT_ARENA_DEATH = "arena_death"  # (cobra, células liberadas pelo corpo)
+EVENT_ARENA_SPAWN = "arena_spawn"
+# Power-ups e seus efeitos
+EVENT_POWERUP_EXPIRE = "powerup_expire"  # power-up sumiu da célula sem ser pego
+EVENT_EFFECT = "effect"                  # jogador pegou um power-up com este efeito
+EVENT_EFFECT_END = "effect_end"          # efeito com duração acabou
+
+# Modos em que a cobra da IA disputa o tabuleiro com o jogador
+AI_MODES = ("ai", "competitive")
+
+# Efeitos sorteados quando o jogador pega um power-up. Os com duração ficam em
+# engine.effects até acabar; turbo e lento mudam o intervalo entre ticks de
+# quem conduz o relógio (a tela ou o replay), pontos em dobro vale para a comida.
+EFFECT_BONUS = "bonus"
+EFFECT_PENALTY = "penalty"
+EFFECT_TURBO = "turbo"
+EFFECT_SLOW = "slow"
+EFFECT_DOUBLE = "double"
+EFFECT_NOTHING = "nothing"
+POWERUP_EFFECTS = (EFFECT_BONUS, EFFECT_PENALTY, EFFECT_TURBO, EFFECT_SLOW, EFFECT_DOUBLE,
+                   EFFECT_NOTHING)
+TIMED_EFFECTS = (EFFECT_TURBO, EFFECT_SLOW, EFFECT_DOUBLE)
+# Pontos ganhos ou perdidos com bônus e penalidade
+POWERUP_POINTS = 5
+# Ticks que um power-up fica no tabuleiro e que um efeito dura
+POWERUP_LIFETIME = 100
+EFFECT_DURATION = 50
+
+# Topologias do tabuleiro: o que acontece ao passar por uma borda
+TOPOLOGY_WALLED = "walled"  # bate na parede e o jogo acaba
+TOPOLOGY_WRAP = "wrap"      # reaparece do lado oposto
+TOPOLOGY_PORTAL = "portal"  # como wrap, com pares de portais no meio do tabuleiro
+TOPOLOGIES = (TOPOLOGY_WALLED, TOPOLOGY_WRAP, TOPOLOGY_PORTAL)
+# Topologia de cada modo; os que não estão aqui têm paredes
+MODE_TOPOLOGIES = {"portal": TOPOLOGY_PORTAL}
+# Menor lado do tabuleiro com portais; em tabuleiros menores eles ficariam
+# sobre as posições iniciais das cobras
+PORTAL_MIN_SIZE = 10
+
+# Fração das células internas coberta por paredes em cada modo
+MODE_OBSTACLE_DENSITY = {"obstacles": 0.08}
+# Comprimento (mínimo, máximo) dos trechos de parede sorteados
+OBSTACLE_SEGMENT = (3, 12)
+# Layouts de obstáculos guardados, por tabuleiro, densidade e semente
+OBSTACLE_CACHE_SIZE = 16
+# Células mantidas livres em volta de onde as cobras nascem (raio) e à
+# frente do jogador, que começa andando para a direita
+SPAWN_CLEARANCE = 2
+SPAWN_RUNWAY = 8
+
+# Na arena, muitas cobras da IA dividem o tabuleiro com o jogador. Sem
+# ai_count, uma cobra a cada ARENA_CELLS_PER_SNAKE células, até ARENA_MAX_SNAKES.
+ARENA_MODE = "arena"
+ARENA_CELLS_PER_SNAKE = 200
+ARENA_MAX_SNAKES = 500
+# Uma comida no tabuleiro para cada tantas cobras da arena
+ARENA_SNAKES_PER_FOOD = 4
+# Comidas sorteadas quando uma cobra da arena escolhe um alvo novo
+ARENA_TARGET_SAMPLES = 8
+
+# O que encerra o jogo quando a cabeça do jogador entra na célula
+_DEATH_REASONS = {
+    CELL_SNAKE: "self",
+    CELL_OBSTACLE: "obstacle",
+    CELL_AI: "ai"
+}
+
+# Células onde a cabeça de uma cobra da arena pode entrar
+_ARENA_OPEN = bytearray(256)
+for _tag in (CELL_EMPTY, CELL_FOOD, CELL_POWERUP):
+    _ARENA_OPEN[_tag] = 1
+
+# Efeitos que se anulam: pegar um encerra o outro
+_EXCLUSIVE_EFFECTS = {EFFECT_TURBO: EFFECT_SLOW, EFFECT_SLOW: EFFECT_TURBO}
+
+# Tipos de entrada no heap de engine.timers: (tick, tipo, célula ou efeito)
+_TIMER_POWERUP = 0
+_TIMER_EFFECT = 1
+
+# Células por onde uma cobra pode passar, para o gerador de obstáculos
+_WALKABLE = bytearray(256)
+for _tag in (CELL_EMPTY, CELL_SNAKE, CELL_AI, CELL_POWERUP, CELL_FOOD):
+    _WALKABLE[_tag] = 1
+
+
+def _ring_allows_wall(mask):
+    # mask: vizinhas livres em volta da célula, no sentido horário a partir de
+    # cima (bits pares são as ortogonais). A célula pode virar parede se as
+    # ortogonais livres estão num só trecho contínuo do anel: qualquer caminho
+    # que passava por ela pode contorná-la por esse trecho.
+    if mask == 255:
+        return True
+    runs = 0
+    for start in range(8):
+        if mask >> start & 1 and not mask >> (start - 1) % 8 & 1:
+            end = start
+            touches = False
+            while mask >> end % 8 & 1:
+                touches = touches or end % 2 == 0
+                end += 1
+            runs += touches
+    return runs <= 1
+
+
+# _WALLABLE[mask] diz se a célula com esse anel de vizinhas pode virar parede
+_WALLABLE = bytes(_ring_allows_wall(mask) for mask in range(256))
+
+# Estado gravado por SnakeEngine.to_bytes()
+STATE_MAGIC = b"SNKS"
+STATE_VERSION = 1
+
+# Gerações são únicas entre todos os motores do processo, para que um cache
+# da IA nunca confunda o tabuleiro de uma partida com o de outra
+_GENERATIONS = itertools.count(1)
+
+
+class StateError(ValueError):
+    pass
+
+
+# Tabelas já montadas, por (largura, altura, topologia). São só lidas, então
+# todos os motores com o mesmo tabuleiro usam as mesmas.
+_TOPOLOGY_CACHE = {}
+
+
+def portal_pairs(width, height):
+    # Dois pares de portais em cantos opostos de um retângulo no meio do tabuleiro
+    if width < PORTAL_MIN_SIZE or height < PORTAL_MIN_SIZE:
+        return ()
+    top, bottom = height // 3, height - 1 - height // 3
+    left, right = width // 4, width - 1 - width // 4
+    return ((top * width + left, bottom * width + right),
+            (top * width + right, bottom * width + left))
+
+
+def topology_tables(width, height, topology=TOPOLOGY_WALLED):
+    # Devolve (moves, portais): moves[direção][célula] é a célula seguinte ou
+    # -1 (parede). Montadas com atribuições em fatias, sem laço por célula.
+    key = (width, height, topology)
+    cached = _TOPOLOGY_CACHE.get(key)
+    if cached is not None:
+        return cached
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"topologia desconhecida: {topology}")
+    size = width * height
+    wrap = topology != TOPOLOGY_WALLED
+    up = array("i", range(-width, size - width))
+    up[:width] = array("i", range(size - width, size)) if wrap else array("i", [-1]) * width
+    down = array("i", range(width, size + width))
+    down[size-width:] = array("i", range(width)) if wrap else array("i", [-1]) * width
+    left = array("i", range(-1, size - 1))
+    left[::width] = array("i", range(width - 1, size, width)) if wrap else array("i", [-1]) * height
+    right = array("i", range(1, size + 1))
+    right[width-1::width] = array("i", range(0, size, width)) if wrap else array("i", [-1]) * height
+    moves = {"UP": up, "DOWN": down, "LEFT": left, "RIGHT": right}
+
+    portals = portal_pairs(width, height) if topology == TOPOLOGY_PORTAL else ()
+    if portals:
+        # Quem entraria num portal sai do outro, seguindo na mesma direção
+        base = {direction: array("i", table) for direction, table in moves.items()}
+        for a, b in portals:
+            for entry, far in ((a, b), (b, a)):
+                for direction, table in moves.items():
+                    source = base[OPPOSITE[direction]][entry]
+                    if source >= 0:
+                        table[source] = base[direction][far]
+    _TOPOLOGY_CACHE[key] = moves, portals
+    return moves, portals
+
+
+# Layouts de obstáculos já gerados, do mais antigo ao mais recente
+_OBSTACLE_CACHE = OrderedDict()
+
+# Índice de células livres do tabuleiro vazio, por tamanho; reset só copia
+_FREE_INDEX_CACHE = {}
+
+
+def obstacle_layout(width, height, density, seed, topology=TOPOLOGY_WALLED):
+    # Células de parede (array só de leitura) cobrindo a fração density das
+    # células internas. Trechos retos de parede são sorteados com um RNG
+    # próprio e cada célula é testada só pelo anel de 8 vizinhas: as células
+    # livres continuam todas ligadas entre si, sem nenhum flood fill.
+    key = (width, height, density, seed, topology)
+    cached = _OBSTACLE_CACHE.get(key)
+    if cached is not None:
+        _OBSTACLE_CACHE.move_to_end(key)
+        return cached
+
+    size = width * height
+    grid = bytearray(size)
+    if topology == TOPOLOGY_PORTAL:
+        for pair in portal_pairs(width, height):
+            for cell in pair:
+                grid[cell] = CELL_PORTAL
+    # Área de nascimento marcada como corpo de cobra: passável, mas não vira parede
+    for row, col, runway in ((height // 2, width // 2, SPAWN_RUNWAY), (height // 4, width // 4, 0)):
+        for r in range(max(0, row - SPAWN_CLEARANCE), min(height, row + SPAWN_CLEARANCE + 1)):
+            for c in range(max(0, col - SPAWN_CLEARANCE), min(width, col + SPAWN_CLEARANCE + runway + 1)):
+                if not grid[r * width + c]:
+                    grid[r * width + c] = CELL_SNAKE
+
+    rng = random.Random(f"{seed}:{width}x{height}:{density}:{topology}")
+    walkable = _WALKABLE
+    wallable = _WALLABLE
+    steps = (-width, 1, width, -1)
+    shortest, longest = OBSTACLE_SEGMENT
+    target = int(max(0, width - 2) * max(0, height - 2) * density)
+    cells = array("i")
+    # Só células internas viram parede, então o anel nunca sai do tabuleiro
+    first, last = width, size - width
+    misses = 0
+    while len(cells) < target and misses <= target:
+        cell = rng.randrange(first, last) if first < last else 0
+        step = steps[rng.randrange(4)]
+        placed = 0
+        for _ in range(rng.randint(shortest, longest)):
+            col = cell % width
+            if not first <= cell < last or col == 0 or col == width - 1 or grid[cell]:
+                break
+            up = cell - width
+            down = cell + width
+            mask = (walkable[grid[up]] | walkable[grid[up + 1]] << 1 |
+                    walkable[grid[cell + 1]] << 2 | walkable[grid[down + 1]] << 3 |
+                    walkable[grid[down]] << 4 | walkable[grid[down - 1]] << 5 |
+                    walkable[grid[cell - 1]] << 6 | walkable[grid[up - 1]] << 7)
+            if not wallable[mask]:
+                break
+            grid[cell] = CELL_OBSTACLE
+            cells.append(cell)
+            placed += 1
+            if len(cells) >= target:
+                break
+            cell += step
+        if not placed:
+            misses += 1
+
+    _OBSTACLE_CACHE[key] = cells
+    if len(_OBSTACLE_CACHE) > OBSTACLE_CACHE_SIZE:
+        _OBSTACLE_CACHE.popitem(last=False)
+    return cells
+
+
+class SnakeEngine:
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None, mode="classic", ai=None,
+                 score_multiplier=1, ai_count=None, arena_ai=None, topology=None,
+                 obstacle_density=None):
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.topology = topology or MODE_TOPOLOGIES.get(mode, TOPOLOGY_WALLED)
+        if obstacle_density is None:
+            obstacle_density = MODE_OBSTACLE_DENSITY.get(mode, 0)
+        self.obstacle_density = obstacle_density
+        self.seed = seed
+        # Pontos por comida, conforme a dificuldade
+        self.score_multiplier = score_multiplier
+        # ai(engine, corpo, tag) devolve a direção da cobra da IA
+        self.ai = ai or greedy_ai
+        # Só na arena: quantas cobras e arena_ai(engine, corpos), que devolve
+        # as direções de todas de uma vez
+        self.ai_count = ai_count
+        self.arena_ai = arena_ai or greedy_arena_ai
+        self.reset()
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seed = seed
+        self.rng = random.Random(self.seed)
+        # Muda a cada reset; permite que a IA descarte caches de outro tabuleiro
+        self.generation = next(_GENERATIONS)
+        self.grid = bytearray(self.width * self.height)
+        self._build_free_index()
+        self._shared = False
+        self.moves, self.portals = topology_tables(self.width, self.height, self.topology)
+        for pair in self.portals:
+            for cell in pair:
+                self.set_cell(cell, CELL_PORTAL)
+        self.obstacles = []
+        if self.obstacle_density:
+            # Mesma semente, mesmo layout; sem semente, um layout qualquer
+            layout_seed = self.seed if self.seed is not None else self.rng.getrandbits(64)
+            self.obstacles = obstacle_layout(self.width, self.height, self.obstacle_density,
+                                             layout_seed, self.topology).tolist()
+            self._fill_cells(self.obstacles, CELL_OBSTACLE)
+        self.snake = deque()
+        self.direction = "RIGHT"
+        self.ai_snake = None
+        # Cobras da arena: corpos, pontos, comida perseguida e dona de cada célula
+        self.ai_snakes = []
+        self.ai_scores = []
+        self.ai_targets = []
+        self.owner = None
+        # Todas as comidas do tabuleiro (só na arena, que tem várias)
+        self.foods = None
+        self._food_pos = None
+        # Power-ups no tabuleiro (célula -> tick em que somem), efeitos ativos
+        # (efeito -> tick em que acabam) e o heap com esses vencimentos
+        self.powerups = {}
+        self.effects = {}
+        self.timers = []
+        self.score = 0
+        self.ai_score = 0
+        self.game_over = False
+        self.ticks = 0
+        self._occupy(self.snake, self.to_index(self.height//2, self.width//2), CELL_SNAKE)
+        if self.mode in AI_MODES:
+            self.ai_snake = deque()
+            self._occupy(self.ai_snake, self.to_index(self.height//4, self.width//4), CELL_AI)
+        self.food = self.generate_food()
+        if self.food is not None:
+            self.set_cell(self.food, CELL_FOOD)
+        if self.mode == ARENA_MODE:
+            self._reset_arena()
+
+    def _reset_arena(self):
+        count = self.ai_count
+        if count is None:
+            count = min(ARENA_MAX_SNAKES, max(2, self.width * self.height // ARENA_CELLS_PER_SNAKE))
+        self.owner = array("i", [-1]) * (self.width * self.height)
+        self.foods = []
+        self._food_pos = {}
+        if self.food is not None:
+            self._track_food(self.food)
+        for snake in range(count):
+            cell = self.generate_food()
+            if cell is None:
+                break
+            self.ai_snakes.append(deque())
+            self.ai_scores.append(0)
+            self.ai_targets.append(None)
+            self._arena_occupy(snake, cell)
+        for _ in range(len(self.ai_snakes) // ARENA_SNAKES_PER_FOOD - 1):
+            cell = self.generate_food()
+            if cell is None:
+                break
+            self.set_cell(cell, CELL_FOOD)
+            self._track_food(cell)
+
+    @property
+    def rng(self):
+        # O RNG compartilhado por clone() só é copiado quando alguém o usa
+        if self._rng_shared:
+            rng = random.Random.__new__(random.Random)
+            rng.setstate(self._rng.getstate())
+            self._rng = rng
+            self._rng_shared = False
+        return self._rng
+
+    @rng.setter
+    def rng(self, value):
+        self._rng = value
+        self._rng_shared = False
+
+    def clone(self):
+        # Cópia independente do estado, sem passar por copy.deepcopy. Grade,
+        # índice de células livres, donos e RNG passam a ser compartilhados:
+        # quem escrever primeiro (esta cópia ou a original) copia antes.
+        other = object.__new__(SnakeEngine)
+        other.__dict__.update(self.__dict__)
+        self._shared = other._shared = True
+        self._rng_shared = other._rng_shared = True
+        other.snake = deque(self.snake)
+        other.ai_snake = deque(self.ai_snake) if self.ai_snake is not None else None
+        other.obstacles = list(self.obstacles)
+        other.powerups = dict(self.powerups)
+        other.effects = dict(self.effects)
+        other.timers = list(self.timers)
+        if self.owner is not None:
+            other.ai_snakes = [deque(body) for body in self.ai_snakes]
+            other.ai_scores = list(self.ai_scores)
+            other.ai_targets = list(self.ai_targets)
+            other.foods = list(self.foods)
+            other._food_pos = dict(self._food_pos)
+        return other
+
+    def _unshare(self):
+        self.grid = bytearray(self.grid)
+        self._free = array("i", self._free)
+        self._free_pos = array("i", self._free_pos)
+        if self.owner is not None:
+            self.owner = array("i", self.owner)
+        self._shared = False
+
+    def to_bytes(self):
+        # Estado completo num só bloco: MAGIC, versão e, comprimidos, um
+        # cabeçalho JSON com os escalares seguido dos arrays em binário
+        rng_version, rng_state, gauss = self.rng.getstate()
+        bodies = [self.snake, self.ai_snake or (), *self.ai_snakes]
+        arrays = {
+            "rng": array("I", rng_state),
+            "grid": array("B", self.grid),
+            "free": self._free,
+            "body_lengths": array("i", map(len, bodies)),
+            "bodies": array("i", itertools.chain.from_iterable(bodies)),
+            "obstacles": array("i", self.obstacles),
+            "powerups": array("i", self.powerups),
+            "powerup_expiry": array("i", self.powerups.values()),
+            "ai_scores": array("i", self.ai_scores),
+            "ai_targets": array("i", (-1 if t is None else t for t in self.ai_targets)),
+            "foods": array("i", self.foods or ())
+        }
+        header = {
+            "width": self.width,
+            "height": self.height,
+            "mode": self.mode,
+            "topology": self.topology,
+            "obstacle_density": self.obstacle_density,
+            "seed": self.seed,
+            "score_multiplier": self.score_multiplier,
+            "ai_count": self.ai_count,
+            "direction": self.direction,
+            "score": self.score,
+            "ai_score": self.ai_score,
+            "ticks": self.ticks,
+            "game_over": self.game_over,
+            "food": self.food,
+            "effects": self.effects,
+            "has_ai_snake": self.ai_snake is not None,
+            "arena": self.owner is not None,
+            "rng": [rng_version, gauss],
+            "arrays": [[name, values.typecode, len(values)] for name, values in arrays.items()]
+        }
+        encoded = json.dumps(header).encode("utf-8")
+        body = bytearray(len(encoded).to_bytes(4, "little"))
+        body += encoded
+        for values in arrays.values():
+            body += values.tobytes()
+        return STATE_MAGIC + bytes([STATE_VERSION]) + zlib.compress(body, 1)
+
+    @classmethod
+    def from_bytes(cls, data, ai=None, arena_ai=None):
+        # Motor no mesmo estado de quem chamou to_bytes(); a partida continua
+        # igual, tick a tick, desde que as IAs também sejam as mesmas
+        if data[:4] != STATE_MAGIC:
+            raise StateError("não é um estado do jogo")
+        if len(data) < 5:
+            raise StateError("estado truncado")
+        if data[4] != STATE_VERSION:
+            raise StateError(f"versão de estado não suportada: {data[4]}")
+        try:
+            body = zlib.decompress(data[5:])
+            length = int.from_bytes(body[:4], "little")
+            header = json.loads(body[4:4+length].decode("utf-8"))
+            arrays = {}
+            pos = 4 + length
+            for name, typecode, count in header["arrays"]:
+                values = array(typecode)
+                end = pos + count * values.itemsize
+                values.frombytes(body[pos:end])
+                arrays[name] = values
+                pos = end
+        except (zlib.error, ValueError, KeyError, TypeError) as error:
+            raise StateError(f"estado corrompido: {error}") from None
+
+        engine = object.__new__(cls)
+        engine.width = header["width"]
+        engine.height = header["height"]
+        engine.mode = header["mode"]
+        engine.topology = header.get("topology", TOPOLOGY_WALLED)
+        if engine.topology not in TOPOLOGIES:
+            raise StateError(f"topologia desconhecida: {engine.topology}")
+        engine.moves, engine.portals = topology_tables(engine.width, engine.height, engine.topology)
+        engine.obstacle_density = header.get("obstacle_density", 0)
+        engine.seed = header["seed"]
+        engine.score_multiplier = header["score_multiplier"]
+        engine.ai = ai or greedy_ai
+        engine.ai_count = header["ai_count"]
+        engine.arena_ai = arena_ai or greedy_arena_ai
+        engine.generation = next(_GENERATIONS)
+        rng_version, gauss = header["rng"]
+        engine.rng = random.Random.__new__(random.Random)
+        engine.rng.setstate((rng_version, tuple(arrays["rng"]), gauss))
+        engine.grid = bytearray(arrays["grid"])
+        engine._free = arrays["free"]
+        engine._shared = False
+        engine._rebuild_free_pos()
+
+        bodies = []
+        pos = 0
+        for length in arrays["body_lengths"]:
+            bodies.append(deque(arrays["bodies"][pos:pos+length]))
+            pos += length
+        engine.snake = bodies[0]
+        engine.ai_snake = bodies[1] if header["has_ai_snake"] else None
+        engine.ai_snakes = bodies[2:]
+        engine.ai_scores = arrays["ai_scores"].tolist()
+        engine.ai_targets = [None if t < 0 else t for t in arrays["ai_targets"]]
+        engine.owner = None
+        engine.foods = None
+        engine._food_pos = None
+        if header["arena"]:
+            engine.owner = array("i", [-1]) * (engine.width * engine.height)
+            for snake, body in enumerate(engine.ai_snakes):
+                for cell in body:
+                    engine.owner[cell] = snake
+            engine.foods = arrays["foods"].tolist()
+            engine._food_pos = {cell: pos for pos, cell in enumerate(engine.foods)}
+        engine.obstacles = arrays["obstacles"].tolist()
+        cells = arrays["powerups"].tolist()
+        if "powerup_expiry" in arrays:
+            engine.powerups = dict(zip(cells, arrays["powerup_expiry"].tolist()))
+        else:
+            # Estados anteriores ao agendador: a lista guardava até power-ups já cobertos
+            engine.powerups = {cell: header["ticks"] + POWERUP_LIFETIME for cell in cells
+                               if engine.grid[cell] == CELL_POWERUP}
+        engine.effects = header.get("effects", {})
+        # Uma lista ordenada já é um heap; entradas vencidas que o original
+        # ainda guardava não mudariam nada
+        engine.timers = sorted([(tick, _TIMER_POWERUP, cell) for cell, tick in engine.powerups.items()] +
+                               [(tick, _TIMER_EFFECT, effect) for effect, tick in engine.effects.items()])
+        engine.direction = header["direction"]
+        engine.score = header["score"]
+        engine.ai_score = header["ai_score"]
+        engine.ticks = header["ticks"]
+        engine.game_over = header["game_over"]
+        engine.food = header["food"]
+        return engine
+
+    def to_index(self, row, col):
+        return row * self.width + col
+
+    def to_cell(self, index):
+        return divmod(index, self.width)
+
+    def neighbour(self, index, direction):
+        # Célula seguinte na direção dada, ou None se bater na parede
+        cell = self.moves[direction][index]
+        return cell if cell >= 0 else None
+
+    def _rebuild_free_pos(self):
+        # _free_pos a partir da grade e da ordem gravada de _free
+        width, height = self.width, self.height
+        self._free_pos = array("i", [-2]) * (width * height)
+        for row in range(1, height-1):
+            start = row * width + 1
+            self._free_pos[start:start+width-2] = array("i", [-1]) * (width - 2)
+        free_pos = self._free_pos
+        for pos, cell in enumerate(self._free):
+            free_pos[cell] = pos
+
+    def _build_free_index(self):
+        # _free_pos[célula] é a posição em _free, -1 se ocupada, -2 se na borda
+        # Montado por faixas de linha uma vez por tamanho; depois só copiado
+        key = (self.width, self.height)
+        cached = _FREE_INDEX_CACHE.get(key)
+        if cached is None:
+            free = array("i")
+            free_pos = array("i", [-2]) * (self.width * self.height)
+            for row in range(1, self.height-1):
+                start = row * self.width + 1
+                end = start + self.width - 2
+                free_pos[start:end] = array("i", range(len(free), len(free) + end - start))
+                free.extend(range(start, end))
+            cached = _FREE_INDEX_CACHE[key] = free, free_pos
+        self._free = cached[0][:]
+        self._free_pos = cached[1][:]
+
+    def _fill_cells(self, cells, tag):
+        # set_cell em lote para células vazias de uma grade recém-criada (os
+        # obstáculos de reset): mesma troca com a última livre, sem a chamada
+        # de método por célula
+        grid = self.grid
+        free = self._free
+        free_pos = self._free_pos
+        for cell in cells:
+            grid[cell] = tag
+            pos = free_pos[cell]
+            if pos >= 0:
+                last = free.pop()
+                if last != cell:
+                    free[pos] = last
+                    free_pos[last] = pos
+                free_pos[cell] = -1
+
+    def set_cell(self, index, tag):
+        # Toda mudança na grade passa por aqui para manter o índice de células livres
+        if self._shared:
+            self._unshare()
+        old = self.grid[index]
+        self.grid[index] = tag
+        if old == CELL_EMPTY and tag != CELL_EMPTY:
+            pos = self._free_pos[index]
+            if pos >= 0:
+                last = self._free.pop()
+                if last != index:
+                    self._free[pos] = last
+                    self._free_pos[last] = pos
+                self._free_pos[index] = -1
+        elif old != CELL_EMPTY and tag == CELL_EMPTY:
+            if self._free_pos[index] == -1:
+                self._free_pos[index] = len(self._free)
+                self._free.append(index)
+
+    def free_cells(self):
+        return len(self._free)
+
+    def _occupy(self, body, index, tag):
+        body.appendleft(index)
+        self.set_cell(index, tag)
+
+    def _release_tail(self, body):
+        index = body.pop()
+        self.set_cell(index, CELL_EMPTY)
+        return index
+
+    def generate_food(self):
+        # Sorteia uma célula livre em O(1); None quando o tabuleiro está cheio
+        if not self._free:
+            return None
+        return self._free[self.rng.randrange(len(self._free))]
+
+    def turn(self, direction):
+        # Ignora direções inválidas e a inversão de sentido
+        if direction in DIRECTIONS and direction != OPPOSITE[self.direction]:
+            self.direction = direction
+
+    def step(self, action=None):
+        events = []
+        if self.game_over:
+            return events
+        if action is not None:
+            self.turn(action)
+        self.ticks += 1
+        if self.timers and self.timers[0][0] <= self.ticks:
+            self._run_timers(events)
+        grid = self.grid
+
+        # Atualiza a posição da cobra e verifica colisão com as bordas
+        new_head = self.moves[self.direction][self.snake[0]]
+        if new_head < 0:
+            return self._end(events, "wall")
+
+        # Verifica colisão com a própria cobra, obstáculos e a cobra da IA
+        reason = _DEATH_REASONS.get(grid[new_head])
+        if reason is not None:
+            return self._end(events, reason)
+
+        tag = grid[new_head]
+        self._occupy(self.snake, new_head, CELL_SNAKE)
+        events.append((EVENT_MOVE, new_head))
+        if tag == CELL_POWERUP:
+            self._take_powerup(new_head, events)
+
+        # Verifica se comeu a comida
+        if tag == CELL_FOOD:
+            self.score += self.score_multiplier * (2 if EFFECT_DOUBLE in self.effects else 1)
+            events.append((EVENT_EAT, new_head))
+            if not self._spawn_food(events, new_head):
+                return self._end(events, "board_full")
+            if self.rng.random() < 0.2:
+                powerup = self.generate_food()
+                if powerup is not None:
+                    self._place_powerup(powerup)
+                    events.append((EVENT_POWERUP, powerup))
+        else:
+            events.append((EVENT_TAIL, self._release_tail(self.snake)))
+
+        # Atualiza a cobra da IA
+        if self.ai_snake:
+            self._step_ai(events)
+        if self.ai_snakes:
+            self._step_arena(events)
+
+        return events
+
+    def _place_powerup(self, cell):
+        self.set_cell(cell, CELL_POWERUP)
+        expires = self.ticks + POWERUP_LIFETIME
+        self.powerups[cell] = expires
+        heapq.heappush(self.timers, (expires, _TIMER_POWERUP, cell))
+
+    def _take_powerup(self, cell, events):
+        # O jogador entrou num power-up: sorteia e aplica o efeito
+        self.powerups.pop(cell, None)
+        effect = self.rng.choice(POWERUP_EFFECTS)
+        if effect == EFFECT_BONUS:
+            self.score += POWERUP_POINTS
+        elif effect == EFFECT_PENALTY:
+            self.score = max(0, self.score - POWERUP_POINTS)
+        elif effect in TIMED_EFFECTS:
+            ends = self.ticks + EFFECT_DURATION
+            self._start_effect(effect, ends)
+            heapq.heappush(self.timers, (ends, _TIMER_EFFECT, effect))
+        events.append((EVENT_EFFECT, effect))
+
+    def _start_effect(self, effect, ends):
+        # Pegar o mesmo efeito de novo renova a duração
+        self.effects.pop(_EXCLUSIVE_EFFECTS.get(effect), None)
+        self.effects[effect] = ends
+
+    def _run_timers(self, events):
+        # Dispara o que vence até este tick. Entradas que não batem mais com
+        # o estado (power-up pego ou coberto por outra cobra, efeito renovado
+        # ou anulado) são só descartadas.
+        timers = self.timers
+        while timers and timers[0][0] <= self.ticks:
+            tick, kind, data = heapq.heappop(timers)
+            if kind == _TIMER_POWERUP:
+                if self.powerups.get(data) == tick:
+                    del self.powerups[data]
+                    if self.grid[data] == CELL_POWERUP:
+                        self.set_cell(data, CELL_EMPTY)
+                        events.append((EVENT_POWERUP_EXPIRE, data))
+            elif self.effects.get(data) == tick:
+                del self.effects[data]
+                events.append((EVENT_EFFECT_END, data))
+
+    def _spawn_food(self, events, eaten=None):
+        # Troca a comida comida em eaten por uma nova. Na arena há várias e
+        # self.food aponta para qualquer uma delas.
+        food = self.generate_food()
+        if self.foods is not None:
+            if eaten in self._food_pos:
+                self._untrack_food(eaten)
+            if food is not None:
+                self._track_food(food)
+            self.food = self.foods[0] if self.foods else None
+        else:
+            self.food = food
+        if food is None:
+            return False
+        self.set_cell(food, CELL_FOOD)
+        events.append((EVENT_FOOD, food))
+        return True
+
+    def _track_food(self, cell):
+        self._food_pos[cell] = len(self.foods)
+        self.foods.append(cell)
+
+    def _untrack_food(self, cell):
+        # Remoção por troca com o último, como no índice de células livres
+        pos = self._food_pos.pop(cell)
+        last = self.foods.pop()
+        if last != cell:
+            self.foods[pos] = last
+            self._food_pos[last] = pos
+
+    def _arena_occupy(self, snake, cell):
+        self.ai_snakes[snake].appendleft(cell)
+        self.set_cell(cell, CELL_AI)
+        self.owner[cell] = snake
+
+    def _arena_release_tail(self, snake):
+        cell = self.ai_snakes[snake].pop()
+        self.set_cell(cell, CELL_EMPTY)
+        self.owner[cell] = -1
+        return cell
+
+    def _step_arena(self, events):
+        # Todas as cobras da arena escolhem a jogada numa única chamada e as
+        # colisões são resolvidas juntas na grade de ocupação: o custo do tick
+        # cresce com o número de cobras, não com o tamanho delas. Como no
+        # jogador, as caudas ainda ocupam a célula durante a verificação.
+        snakes = self.ai_snakes
+        grid = self.grid
+        tables = self.moves
+        moves = self.arena_ai(self, snakes)
+        claims = {}
+        dead = []
+        for snake, direction in enumerate(moves):
+            body = snakes[snake]
+            if not body:
+                continue
+            cell = tables[direction][body[0]]
+            if cell < 0 or not _ARENA_OPEN[grid[cell]]:
+                dead.append(snake)
+            elif cell in claims:
+                # Duas cabeças na mesma célula: as duas morrem
+                other = claims[cell]
+                if other >= 0:
+                    dead.append(other)
+                    claims[cell] = -1
+                dead.append(snake)
+            else:
+                claims[cell] = snake
+
+        for cell, snake in claims.items():
+            if snake < 0:
+                continue
+            ate = grid[cell] == CELL_FOOD
+            self._arena_occupy(snake, cell)
+            events.append((EVENT_ARENA_MOVE, (snake, cell)))
+            if ate:
+                self.ai_scores[snake] += self.score_multiplier
+                self.ai_score += self.score_multiplier
+                events.append((EVENT_ARENA_EAT, (snake, cell)))
+                self._spawn_food(events, cell)
+            else:
+                events.append((EVENT_ARENA_TAIL, (snake, self._arena_release_tail(snake))))
+
+        for snake in dead:
+            self._arena_respawn(snake, events)
+
+    def _arena_respawn(self, snake, events):
+        # A cobra morta libera o corpo e renasce com uma célula num lugar livre
+        events.append((EVENT_ARENA_DEATH, (snake, self._arena_clear(snake))))
+        cell = self.generate_food()
+        if cell is not None:
+            self._arena_occupy(snake, cell)
+            events.append((EVENT_ARENA_SPAWN, (snake, cell)))
+
+    def _arena_clear(self, snake):
+        body = self.ai_snakes[snake]
+        cells = list(body)
+        for cell in cells:
+            self.set_cell(cell, CELL_EMPTY)
+            self.owner[cell] = -1
+        body.clear()
+        self.ai_scores[snake] = 0
+        self.ai_targets[snake] = None
+        return cells
+
+    def apply_events(self, events):
+        # Repete numa cópia do estado (o espelho de um cliente de rede) as
+        # mudanças descritas pelos eventos de step(), na mesma ordem. O que o
+        # espelho já sabe pode vir como None: a célula da cauda que sai e o
+        # corpo de uma cobra da arena que morreu. Devolve os eventos completos.
+        # Pontos, direção e tick não vêm nos eventos e ficam a cargo de quem chama.
+        applied = []
+        for event, data in events:
+            if event == EVENT_MOVE:
+                self._occupy(self.snake, data, CELL_SNAKE)
+            elif event == EVENT_TAIL:
+                data = self._release_tail(self.snake)
+            elif event == EVENT_FOOD:
+                # O espelho não mantém a lista de comidas da arena
+                self.set_cell(data, CELL_FOOD)
+                self.food = data
+            elif event == EVENT_POWERUP:
+                # O espelho não agenda vencimentos; eles chegam como eventos
+                self.set_cell(data, CELL_POWERUP)
+                self.powerups[data] = None
+            elif event == EVENT_POWERUP_EXPIRE:
+                self.powerups.pop(data, None)
+                self.set_cell(data, CELL_EMPTY)
+            elif event == EVENT_EFFECT:
+                self.powerups.pop(self.snake[0], None)
+                if data in TIMED_EFFECTS:
+                    self._start_effect(data, None)
+            elif event == EVENT_EFFECT_END:
+                self.effects.pop(data, None)
+            elif event == EVENT_AI_MOVE:
+                self._occupy(self.ai_snake, data, CELL_AI)
+            elif event == EVENT_AI_TAIL:
+                data = self._release_tail(self.ai_snake)
+            elif event in (EVENT_ARENA_MOVE, EVENT_ARENA_SPAWN):
+                self._arena_occupy(*data)
+            elif event == EVENT_ARENA_TAIL:
+                data = (data[0], self._arena_release_tail(data[0]))
+            elif event == EVENT_ARENA_EAT:
+                self.ai_scores[data[0]] += self.score_multiplier
+            elif event == EVENT_ARENA_DEATH:
+                data = (data[0], self._arena_clear(data[0]))
+            elif event == EVENT_GAME_OVER:
+                self.game_over = True
+            applied.append((event, data))
+        return applied
+
+    def _step_ai(self, events):
+        ai_new_head = self.neighbour(self.ai_snake[0], self.get_ai_move())
+        if ai_new_head is None:
+            return
+        tag = self.grid[ai_new_head]
+        if tag in (CELL_AI, CELL_OBSTACLE, CELL_SNAKE):
+            return
+        self._occupy(self.ai_snake, ai_new_head, CELL_AI)
+        events.append((EVENT_AI_MOVE, ai_new_head))
+        if tag == CELL_FOOD:
+            self.ai_score += self.score_multiplier
+            events.append((EVENT_AI_EAT, ai_new_head))
+            if not self._spawn_food(events, ai_new_head):
+                self._end(events, "board_full")
+        else:
+            events.append((EVENT_AI_TAIL, self._release_tail(self.ai_snake)))
+
+    def _end(self, events, reason):
+        self.game_over = True
+        events.append((EVENT_GAME_OVER, reason))
+        return events
+
+    def get_ai_move(self):
+        if not self.ai_snake:
+            return "RIGHT"
+        return self.ai(self, self.ai_snake, CELL_AI)
+
+
+def greedy_move(engine, head, own_tag):
+    # Escolhe o vizinho livre mais próximo da comida (distância de Manhattan)
+    if engine.food is None:
+        return engine.direction
+    food_row, food_col = engine.to_cell(engine.food)
+    possible_moves = []
+
+    # Verifica movimentos possíveis
+    for direction in DIRECTIONS:
+        cell = engine.neighbour(head, direction)
+        if cell is None:
+            continue
+        tag = engine.grid[cell]
+        if tag != own_tag and tag != CELL_OBSTACLE:
+            row, col = engine.to_cell(cell)
+            possible_moves.append((direction, abs(row - food_row) + abs(col - food_col)))
+
+    if possible_moves:
+        return min(possible_moves, key=lambda x: x[1])[0]
+    return engine.rng.choice(["UP", "DOWN", "LEFT", "RIGHT"])
+
+
+def greedy_ai(engine, body, own_tag):
+    return greedy_move(engine, body[0], own_tag)
+
+
+def greedy_arena_ai(engine, snakes):
+    # Jogadas de todas as cobras da arena numa chamada. Cada cobra persegue
+    # uma comida-alvo, trocada só quando ela some do tabuleiro: a mais perto
+    # entre algumas sorteadas. O passo é o vizinho livre mais perto do alvo.
+    grid = engine.grid
+    width = engine.width
+    tables = engine.moves.items()
+    foods = engine.foods
+    targets = engine.ai_targets
+    rng = engine.rng
+    moves = []
+    for snake, body in enumerate(snakes):
+        if not body:
+            moves.append(None)
+            continue
+        row, col = divmod(body[0], width)
+        target = targets[snake]
+        if (target is None or grid[target] != CELL_FOOD) and foods:
+            target = None
+            best = None
+            for _ in range(ARENA_TARGET_SAMPLES):
+                food = foods[rng.randrange(len(foods))]
+                food_row, food_col = divmod(food, width)
+                dist = abs(row - food_row) + abs(col - food_col)
+                if best is None or dist < best:
+                    best = dist
+                    target = food
+            targets[snake] = target
+        if target is None:
+            target_row, target_col = row, col
+        else:
+            target_row, target_col = divmod(target, width)
+
+        move = None
+        best = None
+        head = body[0]
+        for direction, table in tables:
+            cell = table[head]
+            if cell >= 0 and _ARENA_OPEN[grid[cell]]:
+                next_row, next_col = divmod(cell, width)
+                dist = abs(next_row - target_row) + abs(next_col - target_col)
+                if best is None or dist < best:
+                    best = dist
+                    move = direction
+        moves.append(move or "UP")
+    return moves
+
+
+def greedy_policy(engine):
+    # Política para a cobra do jogador usando a mesma heurística da IA
+    return greedy_move(engine, engine.snake[0], CELL_SNAKE)
+
+
+def run_many(seeds, policy, max_ticks=10000, **engine_options):
+    # Simula vários jogos sem janela; policy(engine) devolve a direção do tick
+    results = []
+    engine = SnakeEngine(**engine_options)
+    for seed in seeds:
+        engine.reset(seed)
+        while not engine.game_over and engine.ticks < max_ticks:
+            engine.step(policy(engine))
+        results.append({
+            "seed": seed,
+            "score": engine.score,
+            "ai_score": engine.ai_score,
+            "length": len(engine.snake),
+            "ticks": engine.ticks,
+            "game_over": engine.game_over
+        })
+    return results
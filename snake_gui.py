@@ -1,22 +1,80 @@
-import pygame
-import random
 import time
 import os
-from plyer import notification
+
+# Marca o início da importação, para medir o tempo de inicialização
+_STARTUP = time.perf_counter()
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+import random
 import logging
 from datetime import datetime
 import sys
-
-# Configuração inicial do Pygame
-pygame.init()
-pygame.font.init()
+from collections import OrderedDict, deque
+from snake_engine import (SnakeEngine, StateError, DIRECTIONS, OPPOSITE, CELL_EMPTY, CELL_SNAKE, CELL_AI,
+                          CELL_OBSTACLE, CELL_POWERUP, CELL_FOOD, CELL_PORTAL, EVENT_MOVE,
+                          EVENT_TAIL, EVENT_FOOD, EVENT_POWERUP, EVENT_AI_MOVE,
+                          EVENT_AI_TAIL, EVENT_ARENA_MOVE, EVENT_ARENA_TAIL,
+                          EVENT_ARENA_DEATH, EVENT_ARENA_SPAWN, EVENT_POWERUP_EXPIRE,
+                          EVENT_EFFECT, EFFECT_TURBO, EFFECT_SLOW)
+from snake_ai import SearchAI
+from snake_scores import ScoreStore
+from snake_replay import ReplayRecorder, ReplayPlayer, ReplayError, parse as parse_replay
+from snake_profile import FrameProfiler
+from snake_worker import BackgroundWorker, NullNotifier, route_logging
 
 # Configurações da tela
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 GRID_SIZE = 20
+# Células visíveis na tela; também o tamanho padrão do tabuleiro
 GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
 GRID_HEIGHT = SCREEN_HEIGHT // GRID_SIZE
+SCORE_POSITION = (10, 10)
+
+# Laço do jogo: a simulação avança no intervalo da dificuldade e a tela é
+# desenhada na taxa abaixo, interpolando o movimento entre os ticks
+RENDER_FPS = 60
+# Limite de ticks recuperados num único quadro depois de um travamento
+MAX_TICKS_PER_FRAME = 5
+# Teclas apertadas entre dois ticks ficam numa fila, aplicadas uma por tick
+MAX_QUEUED_TURNS = 3
+# Duração do turbo da tecla T, em milissegundos
+TURBO_DURATION = 3000
+# Ticks em que o efeito de um power-up recém-pego aparece no placar
+EFFECT_MESSAGE_TICKS = 20
+
+# Pasta onde o replay de cada partida é salvo ao fim do jogo
+REPLAY_DIR = "replays"
+
+# Jogo salvo na tela de pausa (F5) e retomado com F9: estado do motor e o
+# replay até ali, cada um precedido do tamanho em 4 bytes
+SAVE_FILE = "savegame.snkg"
+SAVE_MAGIC = b"SNKG"
+
+# Painel de desempenho (F3): canto superior direito, refeito a cada
+# HUD_REFRESH quadros, com as HUD_LINES fases de pior p99
+HUD_POSITION = (SCREEN_WIDTH - 10, 10)
+HUD_REFRESH = 30
+HUD_LINES = 10
+# Arquivo padrão de --profile; .json grava em JSON, o resto em CSV
+PROFILE_FILE = "profile.csv"
+
+# Métodos do SnakeGame medidos quando o profiler está ligado
+PROFILED_GAME_METHODS = ("draw_visible", "draw_cell", "draw_head", "draw_sliding_head",
+                         "draw_shrinking_tail", "draw_score", "draw_pause", "draw_game_over",
+                         "draw_grid", "draw_hud")
+
+KEY_DIRECTIONS = {
+    pygame.K_UP: "UP",
+    pygame.K_w: "UP",
+    pygame.K_DOWN: "DOWN",
+    pygame.K_s: "DOWN",
+    pygame.K_LEFT: "LEFT",
+    pygame.K_a: "LEFT",
+    pygame.K_RIGHT: "RIGHT",
+    pygame.K_d: "RIGHT"
+}
 
 # Cores
 
@@ -43,9 +101,32 @@ GAME_MODES = {
     "🚧 Modo Obstáculos": "obstacles",
     "🌈 Modo Colorido": "colorful",
     "🎯 Modo Precisão": "precision",
-    "⚔️ Modo Competitivo": "competitive"
+    "⚔️ Modo Competitivo": "competitive",
+    "🏟️ Arena": "arena"
 }
 
+# Cores das cobras da arena (cabeça, corpo), escolhidas pelo número da cobra
+ARENA_COLORS = [
+    ((255, 80, 80), (139, 0, 0)),
+    ((255, 170, 60), (150, 80, 0)),
+    ((240, 240, 90), (130, 130, 0)),
+    ((120, 255, 120), (0, 120, 40)),
+    ((90, 220, 255), (0, 90, 140)),
+    ((150, 140, 255), (60, 40, 160)),
+    ((255, 120, 230), (140, 20, 110)),
+    ((220, 220, 220), (110, 110, 110))
+]
+
+# Modo colorido: a cobra é pintada com um gradiente de COLORFUL_STEPS tons.
+# Cada segmento fica com o tom do tick em que a cabeça passou por ele, então a
+# cor de uma célula não muda enquanto a cobra a ocupa e as faixas andam junto
+COLORFUL_MODE = "colorful"
+COLORFUL_STEPS = 32
+
+# Modo espectador (snake_gui.py spectate): a cobra do jogador joga sozinha na
+# arena e uma nova partida começa este tempo (ms) depois de ela morrer
+SPECTATE_RESTART = 2000
+
 # Configuração das dificuldades
 DIFFICULTY_LEVELS = {
     "🐢 Fácil": (150, 1),
@@ -55,6 +136,14 @@ DIFFICULTY_LEVELS = {
     "⚡ Ultra": (30, 10)
 }
 
+# Tamanhos de tabuleiro (colunas, linhas). Nos maiores que a tela, a câmera
+# segue a cabeça da cobra e só as células visíveis são desenhadas
+BOARD_SIZES = {
+    "📐 40x30": (GRID_WIDTH, GRID_HEIGHT),
+    "🗺️ 200x150": (200, 150),
+    "🌍 1000x1000": (1000, 1000)
+}
+
 # Configuração dos temas
 THEMES = {
     "🌙 Escuro": {
@@ -63,6 +152,7 @@ THEMES = {
         "food": COLORS["RED"],
         "obstacle": COLORS["YELLOW"],
         "powerup": COLORS["MAGENTA"],
+        "portal": COLORS["BLUE"],
         "text": COLORS["WHITE"],
         "border": COLORS["CYAN"],
         "score": COLORS["YELLOW"],
@@ -74,6 +164,7 @@ THEMES = {
         "food": COLORS["RED"],
         "obstacle": COLORS["YELLOW"],
         "powerup": COLORS["MAGENTA"],
+        "portal": COLORS["DARK_BLUE"],
         "text": COLORS["BLACK"],
         "border": COLORS["CYAN"],
         "score": COLORS["YELLOW"],
@@ -85,6 +176,7 @@ THEMES = {
         "food": COLORS["RED"],
         "obstacle": COLORS["YELLOW"],
         "powerup": COLORS["MAGENTA"],
+        "portal": COLORS["WHITE"],
         "text": COLORS["GREEN"],
         "border": COLORS["CYAN"],
         "score": COLORS["YELLOW"],
@@ -92,32 +184,52 @@ THEMES = {
     }
 }
 
-# Efeitos de power-up
-POWERUP_EFFECTS = [
-    ("+5 pontos", lambda score, speed: (score+5, speed)),
-    ("-5 pontos", lambda score, speed: (max(0, score-5), speed)),
-    ("Turbo!", lambda score, speed: (score, max(20, speed-40))),
-    ("Lento!", lambda score, speed: (score, speed+40)),
-    ("Nada acontece", lambda score, speed: (score, speed)),
-]
+# Texto no placar para cada efeito de power-up (sorteados pelo SnakeEngine)
+POWERUP_LABELS = {
+    "bonus": "+5 pontos",
+    "penalty": "-5 pontos",
+    "turbo": "Turbo!",
+    "slow": "Lento!",
+    "double": "Pontos em dobro",
+    "nothing": "Nada acontece"
+}
+
+
+def effect_interval(interval, effects, turbo=False):
+    # Intervalo entre ticks (ms) com os efeitos ativos do motor; turbo é o da tecla T
+    if turbo or EFFECT_TURBO in effects:
+        interval = max(20, interval - 40)
+    if EFFECT_SLOW in effects:
+        interval += 40
+    return interval
 
 class Button:
+    # Fonte compartilhada por todos os botões, carregada uma única vez
+    _font = None
+
     def __init__(self, x, y, width, height, text, color, hover_color):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
         self.color = color
         self.hover_color = hover_color
         self.is_hovered = False
-        self.font = pygame.font.Font(None, 36)
+        if Button._font is None:
+            Button._font = pygame.font.Font(None, 36)
+        self.font = Button._font
+        self._label = None
+        self._label_text = None
 
     def draw(self, screen):
         color = self.hover_color if self.is_hovered else self.color
         pygame.draw.rect(screen, color, self.rect, border_radius=10)
         pygame.draw.rect(screen, COLORS["WHITE"], self.rect, 2, border_radius=10)
         
-        text_surface = self.font.render(self.text, True, COLORS["WHITE"])
-        text_rect = text_surface.get_rect(center=self.rect.center)
-        screen.blit(text_surface, text_rect)
+        # O texto só é renderizado de novo quando muda
+        if self._label_text != self.text:
+            self._label = self.font.render(self.text, True, COLORS["WHITE"])
+            self._label_text = self.text
+        text_rect = self._label.get_rect(center=self.rect.center)
+        screen.blit(self._label, text_rect)
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEMOTION:
@@ -127,126 +239,747 @@ class Button:
                 return True
         return False
 
+class TextCache:
+    # Cache LRU de textos renderizados, chaveado por (fonte, texto, cor, antialias).
+    # Placar, sobreposições e menus repetem os mesmos textos a cada quadro.
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxsize:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def cache_info(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "maxsize": self.maxsize, "size": len(self.surfaces)}
+
+class SpriteAtlas:
+    # Atlas de sprites de um tema: cada tipo de célula (cabeça em cada direção,
+    # corpos, comida, obstáculo, power-up, portal e o gradiente do modo
+    # colorido) pré-desenhado uma vez. Os sprites já trazem o fundo e as
+    # linhas da grade da célula, então são opacos, saem idênticos ao desenho
+    # com primitivas e uma camada inteira vai numa só chamada de blits.
+    # Sprites de cor sólida têm também uma faixa da largura da tela: uma
+    # sequência deles numa linha vira um único blit de um pedaço da faixa.
+    def __init__(self, theme, background):
+        self.theme = theme
+        self.cell = background.subsurface((0, 0, GRID_SIZE, GRID_SIZE)).copy()
+        self.strips = {}
+        radius = GRID_SIZE // 2
+        center = (radius, radius)
+
+        self.snake = self._square(theme["snake"])
+        self.heads = {direction: self._head(theme["snake"], direction) for direction in DIRECTIONS}
+        self.ai_head = self._square(COLORS["RED"])
+        self.ai_body = self._square(COLORS["DARK_RED"])
+        self.arena = [(self._square(head), self._square(body)) for head, body in ARENA_COLORS]
+        # Sprite de cada tag cujo desenho não depende da célula
+        self.static = [None] * 256
+        self.static[CELL_OBSTACLE] = self._square(theme["obstacle"])
+        self.static[CELL_POWERUP] = self._tile(lambda s: pygame.draw.circle(s, theme["powerup"], center, radius))
+        self.static[CELL_FOOD] = self._tile(lambda s: pygame.draw.circle(s, theme["food"], center, radius))
+        self.static[CELL_PORTAL] = self._tile(lambda s: pygame.draw.circle(s, theme["portal"], center, radius, 3))
+
+        # Gradiente do modo colorido: um giro completo de matiz
+        self.palette = []
+        for step in range(COLORFUL_STEPS):
+            color = pygame.Color(0)
+            color.hsva = (step * 360 / COLORFUL_STEPS, 80, 100, 100)
+            self.palette.append(tuple(color)[:3])
+        # Segmentos vizinhos nunca têm o mesmo tom, então aqui não há faixas
+        self.rainbow = [self._square(color, strip=False) for color in self.palette]
+        self.rainbow_heads = {direction: [self._head(color, direction) for color in self.palette]
+                              for direction in DIRECTIONS}
+
+    def _tile(self, paint):
+        surface = self.cell.copy()
+        paint(surface)
+        return surface
+
+    def _square(self, color, strip=True):
+        sprite = self._tile(lambda surface: surface.fill(color))
+        if strip:
+            self.strips[sprite] = pygame.Surface((SCREEN_WIDTH, GRID_SIZE)).convert()
+            self.strips[sprite].fill(color)
+        return sprite
+
+    def _head(self, color, direction):
+        # Cabeça com os olhos virados para a direção do movimento
+        eye = GRID_SIZE // 4
+        near, far = eye, GRID_SIZE - eye
+        eyes = {
+            "RIGHT": ((far, near), (far, far)),
+            "LEFT": ((near, near), (near, far)),
+            "UP": ((near, near), (far, near)),
+            "DOWN": ((near, far), (far, far))
+        }[direction]
+
+        def paint(surface):
+            surface.fill(color)
+            for center in eyes:
+                pygame.draw.circle(surface, COLORS["BLACK"], center, eye)
+        return self._tile(paint)
+
+class Camera:
+    # Janela de cols x rows células sobre o tabuleiro. Segue a cabeça com uma
+    # zona morta: enquanto ela fica longe das bordas da tela a câmera não se
+    # move (e a tela continua sendo atualizada por retângulos); quando sai,
+    # a câmera recentraliza nela de uma vez.
+    def __init__(self, cols, rows, margin=0.25):
+        self.cols = cols
+        self.rows = rows
+        self.margin_cols = int(cols * margin)
+        self.margin_rows = int(rows * margin)
+        self.row = 0
+        self.col = 0
+
+    def center(self, engine):
+        row, col = engine.to_cell(engine.snake[0])
+        self.row = min(max(0, row - self.rows // 2), max(0, engine.height - self.rows))
+        self.col = min(max(0, col - self.cols // 2), max(0, engine.width - self.cols))
+
+    def follow(self, engine):
+        # Devolve True quando a câmera se moveu e a tela precisa ser refeita
+        row, col = engine.to_cell(engine.snake[0])
+        old = (self.row, self.col)
+        if not (self.row + self.margin_rows <= row < self.row + self.rows - self.margin_rows and
+                self.col + self.margin_cols <= col < self.col + self.cols - self.margin_cols):
+            self.center(engine)
+        return (self.row, self.col) != old
+
+    def contains(self, row, col):
+        return self.row <= row < self.row + self.rows and self.col <= col < self.col + self.cols
+
+    def origin(self, row, col):
+        # Canto superior esquerdo da célula na tela, em pixels
+        return (col - self.col) * GRID_SIZE, (row - self.row) * GRID_SIZE
+
+class GameRenderer:
+    # Desenha a tela do jogo atualizando só o que mudou: o fundo com a grade é
+    # pré-renderizado uma vez por tema, e a cada tick apenas as células citadas
+    # nos eventos do motor (cabeça, cauda, comida...) e a área do placar são
+    # redesenhadas e enviadas com pygame.display.update(retângulos).
+    # Entre dois ticks, a cabeça desliza e a cauda encolhe conforme a fração
+    # do intervalo já decorrida (alpha).
+    def __init__(self, game):
+        self.game = game
+        self.backgrounds = {}
+        self.dirty = set()
+        # Movimento do último tick por cobra: tag -> [cabeça, cabeça anterior, cauda liberada]
+        self.motions = {}
+        self.full_redraw = True
+        self.overlay = None
+        self.score_text = None
+        self.score_rect = pygame.Rect(SCORE_POSITION, (0, 0))
+        self.hud = None
+        self.hud_rect = None
+
+    def background(self):
+        theme = self.game.current_theme
+        key = (theme["background"], theme["border"])
+        surface = self.backgrounds.get(key)
+        if surface is None:
+            surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+            surface.fill(theme["background"])
+            self.game.draw_grid(surface)
+            self.backgrounds[key] = surface
+        return surface
+
+    def invalidate(self):
+        # Chamado sempre que o motor muda (nova partida, replay, busca)
+        self.full_redraw = True
+        self.motions = {}
+        self.game.effect_message = None
+        self.game.camera.center(self.game.engine)
+
+    def apply(self, events):
+        # Marca as células alteradas por um tick do motor
+        engine = self.game.engine
+        for event, data in events:
+            if event in (EVENT_FOOD, EVENT_POWERUP, EVENT_POWERUP_EXPIRE):
+                self.dirty.add(data)
+            elif event == EVENT_EFFECT:
+                self.game.effect_message = (POWERUP_LABELS[data], engine.ticks + EFFECT_MESSAGE_TICKS)
+            elif event == EVENT_MOVE:
+                self._start_motion(CELL_SNAKE, data, engine.snake)
+            elif event == EVENT_AI_MOVE:
+                self._start_motion(CELL_AI, data, engine.ai_snake)
+            elif event == EVENT_TAIL:
+                self.dirty.add(data)
+                self.motions[CELL_SNAKE][2] = data
+            elif event == EVENT_AI_TAIL:
+                self.dirty.add(data)
+                self.motions[CELL_AI][2] = data
+            elif event == EVENT_ARENA_MOVE:
+                # Sem interpolação: com centenas de cobras, só o jogador desliza.
+                # A cabeça anterior muda de cor e também é redesenhada.
+                snake, cell = data
+                self.dirty.add(cell)
+                body = engine.ai_snakes[snake]
+                if len(body) > 1:
+                    self.dirty.add(body[1])
+            elif event in (EVENT_ARENA_TAIL, EVENT_ARENA_SPAWN):
+                self.dirty.add(data[1])
+            elif event == EVENT_ARENA_DEATH:
+                self.dirty.update(data[1])
+
+    def _start_motion(self, tag, head, body):
+        # As células do movimento anterior voltam a ser desenhadas por inteiro;
+        # a cabeça anterior vira corpo e perde os olhos
+        old = self.motions.get(tag)
+        if old:
+            self.dirty.update(cell for cell in old if cell is not None)
+        prev = body[1] if len(body) > 1 else None
+        self.motions[tag] = [head, prev, None]
+        self.dirty.add(head)
+        if prev is not None:
+            self.dirty.add(prev)
+
+    def _motion_tail(self, tag):
+        engine = self.game.engine
+        body = engine.snake if tag == CELL_SNAKE else engine.ai_snake
+        return body[-1] if body else None
+
+    def _cells_in(self, rect):
+        # Células do tabuleiro sob um retângulo da tela
+        engine = self.game.engine
+        camera = self.game.camera
+        cells = []
+        for row in range(camera.row + rect.top // GRID_SIZE,
+                         min(camera.row + rect.bottom // GRID_SIZE + 1, engine.height)):
+            for col in range(camera.col + rect.left // GRID_SIZE,
+                             min(camera.col + rect.right // GRID_SIZE + 1, engine.width)):
+                cells.append(engine.to_index(row, col))
+        return cells
+
+    def render(self, overlay=None, alpha=1.0):
+        # overlay: None, "pause" ou "game_over"; alpha: fração do tick atual
+        if overlay != self.overlay:
+            self.overlay = overlay
+            self.full_redraw = True
+        if self.game.camera.follow(self.game.engine):
+            self.full_redraw = True
+        if self.full_redraw:
+            self._render_full()
+            return
+        if overlay is not None:
+            # Nada muda por baixo da sobreposição
+            return
+
+        game = self.game
+        engine = game.engine
+        sliding = set()
+        for tag, (head, prev, vacated) in self.motions.items():
+            self.dirty.add(head)
+            if prev is not None:
+                self.dirty.add(prev)
+                sliding.add(head)
+            if vacated is not None:
+                self.dirty.add(vacated)
+                self.dirty.add(self._motion_tail(tag))
+
+        # O texto do placar é antialiased: redesenhá-lo por cima dele mesmo
+        # escurece as bordas, então as células embaixo dele são repintadas antes
+        text = game.score_text()
+        score_cells = self._cells_in(self.score_rect)
+        redraw_score = text != self.score_text or not self.dirty.isdisjoint(score_cells)
+        if redraw_score:
+            self.dirty.update(score_cells)
+            self.score_text = text
+
+        # O painel de desempenho segue a mesma regra, cobrindo também a área
+        # antiga quando ele muda de tamanho ou é escondido
+        hud = game.hud_surface()
+        hud_rect = hud.get_rect(topright=HUD_POSITION) if hud is not None else None
+        hud_area = [rect for rect in (hud_rect, self.hud_rect) if rect is not None]
+        hud_cells = self._cells_in(hud_area[0].unionall(hud_area[1:])) if hud_area else []
+        redraw_hud = hud is not self.hud or not self.dirty.isdisjoint(hud_cells)
+        if redraw_hud:
+            self.dirty.update(hud_cells)
+
+        # Células sujas numa só chamada de blits: o sprite (que já traz o
+        # fundo) ou, se vazia ou com a cabeça deslizando, o pedaço do fundo
+        background = self.background()
+        camera = game.camera
+        grid = engine.grid
+        rects = []
+        batch = []
+        for index in self.dirty:
+            row, col = engine.to_cell(index)
+            if not camera.contains(row, col):
+                continue
+            rect = pygame.Rect(camera.origin(row, col), (GRID_SIZE, GRID_SIZE))
+            tag = grid[index]
+            if tag == CELL_EMPTY or index in sliding:
+                batch.append((background, rect, rect))
+            else:
+                batch.append((game.cell_sprite(index, tag), rect))
+            rects.append(rect)
+        game.screen.blits(batch, doreturn=False)
+        self.dirty.clear()
+
+        for tag, (head, prev, vacated) in self.motions.items():
+            if vacated is not None and engine.grid[vacated] == CELL_EMPTY:
+                game.draw_shrinking_tail(tag, vacated, self._motion_tail(tag), alpha)
+            if prev is not None:
+                game.draw_sliding_head(tag, head, prev, alpha)
+
+        # O placar e o painel ficam por cima das células
+        if redraw_score:
+            score_rect = game.draw_score()
+            rects.append(score_rect.union(self.score_rect))
+            self.score_rect = score_rect
+        if redraw_hud:
+            if hud is not None:
+                game.screen.blit(hud, hud_rect)
+                rects.append(hud_rect)
+            self.hud = hud
+            self.hud_rect = hud_rect
+
+        if rects:
+            self.present(rects)
+
+    def present(self, rects=None):
+        # Envia para a tela só os retângulos dados, ou a tela inteira
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+    def _render_full(self):
+        game = self.game
+        game.screen.blit(self.background(), (0, 0))
+        game.draw_visible()
+        self.score_rect = game.draw_score()
+        self.score_text = game.score_text()
+        self.hud = game.hud_surface()
+        self.hud_rect = None
+        if self.hud is not None:
+            self.hud_rect = self.hud.get_rect(topright=HUD_POSITION)
+            game.screen.blit(self.hud, self.hud_rect)
+
+        if self.overlay == "pause":
+            game.draw_pause()
+        elif self.overlay == "game_over":
+            game.draw_game_over()
+
+        self.present()
+        self.dirty.clear()
+        self.full_redraw = False
+
+def init_pygame(headless=False):
+    # Inicializa só os módulos usados (vídeo/eventos e fontes); pygame.init()
+    # também abriria o áudio, que o jogo não usa e que é lento para iniciar.
+    # headless usa o driver de vídeo "dummy" do SDL, sem abrir janela.
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.display.init()
+    pygame.font.init()
+
 class SnakeGame:
-    def __init__(self):
+    def __init__(self, headless=False):
+        self.headless = headless
+        init_pygame(headless)
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Jogo da Cobrinha")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
+        self.text_cache = TextCache()
+        self.camera = Camera(GRID_WIDTH, GRID_HEIGHT)
+        # Sobreposições semitransparentes prontas, por tamanho de tela
+        self.overlays = {}
         self.current_theme = THEMES["🌙 Escuro"]
+        self.mode_name = "🎮 Clássico"
+        self.difficulty_name = "🐍 Médio"
+        self.board_name = "📐 40x30"
+        # E/S do fim da partida (placar, replay, notificação) e log vão para
+        # esta thread; sem janela, as notificações não saem
+        self.worker = BackgroundWorker(NullNotifier() if headless else None).start()
+        self.scores = ScoreStore().load()
+        self.ai = SearchAI()
+        self.renderer = GameRenderer(self)
+        self.profiler = FrameProfiler()
+        self.show_hud = False
+        self.hud = None
+        self.hud_frame = 0
+        self.hud_font = None
+        # Arquivo onde as medições são gravadas ao sair (--profile)
+        self.profile_path = None
+        # Cobras da arena (None: conforme o tamanho do tabuleiro) e, no modo
+        # espectador, a política que joga no lugar do jogador
+        self.arena_snakes = None
+        self.autopilot = None
+        self.restart_timer = 0
+        # Aviso mostrado na tela de pausa (jogo salvo, carregado ou erro)
+        self.pause_message = None
+        # Efeito do último power-up pego: (texto, tick até o qual aparece)
+        self.effect_message = None
+        # Sprites do tema atual e, no modo colorido, a posição de cada segmento
+        self.atlas = None
+        self.segments = None
+        # Telas de menu já desenhadas: nome -> (superfície, botões)
+        self.screen_cache = {}
         self.reset_game()
 
     def reset_game(self):
-        self.snake = [[GRID_HEIGHT//2, GRID_WIDTH//2]]
-        self.direction = "RIGHT"
-        self.obstacles = []
-        self.ai_snake = None
-        self.powerups = []
-        self.score = 0
+        # Toda a regra do jogo fica no SnakeEngine; aqui só o estado da interface
+        # Semente própria por partida, para que o replay reproduza a comida e os power-ups
+        width, height = BOARD_SIZES[self.board_name]
+        self.engine = SnakeEngine(width, height, seed=random.randrange(2**32),
+                                  mode=GAME_MODES[self.mode_name], ai=self.ai,
+                                  score_multiplier=DIFFICULTY_LEVELS[self.difficulty_name][1],
+                                  ai_count=self.arena_snakes)
+        self.recorder = ReplayRecorder(self.engine, difficulty=self.difficulty_name)
+        if self.profiler.enabled:
+            self.profiler.wrap(self.engine, "get_ai_move", "ai")
         self.max_score = self.load_record()
-        self.game_over = False
         self.paused = False
         self.turbo_timer = 0
-        self.ai_score = 0
+        self.pending_turns = deque()
+        # Milissegundos acumulados desde o último tick da simulação
+        self.accumulator = 0
+        self.restart_clock()
         self.start_time = time.time()
-        self.food = self.generate_food()
-
-    def generate_food(self):
-        while True:
-            pos = [random.randint(1, GRID_HEIGHT-2), random.randint(1, GRID_WIDTH-2)]
-            if pos not in self.snake and pos not in self.obstacles and (self.ai_snake is None or pos not in self.ai_snake):
-                return pos
-
-    def draw_grid(self):
+        self.renderer.invalidate()
+        self.result_saved = False
+        self.restart_timer = 0
+        self.pause_message = None
+
+    def save_game(self, path=SAVE_FILE):
+        data = bytearray(SAVE_MAGIC)
+        for part in (self.engine.to_bytes(), self.recorder.to_bytes()):
+            data += len(part).to_bytes(4, "little")
+            data += part
+        try:
+            with open(path, "wb") as f:
+                f.write(data)
+        except OSError as error:
+            logging.getLogger(__name__).warning("Não foi possível salvar o jogo: %s", error)
+            return False
+        return True
+
+    def load_game(self, path=SAVE_FILE):
+        # Retoma a partida salva com as configurações com que ela foi jogada
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if data[:4] != SAVE_MAGIC:
+                raise StateError("não é um jogo salvo")
+            parts = []
+            pos = 4
+            for _ in range(2):
+                if pos + 4 > len(data):
+                    raise StateError("jogo salvo truncado")
+                length = int.from_bytes(data[pos:pos+4], "little")
+                parts.append(data[pos+4:pos+4+length])
+                if len(parts[-1]) != length:
+                    raise StateError("jogo salvo truncado")
+                pos += 4 + length
+            engine = SnakeEngine.from_bytes(parts[0], ai=self.ai)
+            header = parse_replay(parts[1])[0]
+            recorder = ReplayRecorder.resume(engine, parts[1])
+        except (OSError, StateError, ReplayError, KeyError, IndexError, TypeError) as error:
+            # Campos que faltam num arquivo adulterado também contam como erro de carga
+            logging.getLogger(__name__).warning("Não foi possível carregar o jogo: %s", error)
+            return False
+        self.mode_name = next((name for name, mode in GAME_MODES.items() if mode == engine.mode),
+                              self.mode_name)
+        self.board_name = next((name for name, size in BOARD_SIZES.items()
+                                if size == (engine.width, engine.height)), self.board_name)
+        if header.get("difficulty") in DIFFICULTY_LEVELS:
+            self.difficulty_name = header["difficulty"]
+        self.engine = engine
+        self.recorder = recorder
+        if self.profiler.enabled:
+            self.profiler.wrap(self.engine, "get_ai_move", "ai")
+        self.pending_turns.clear()
+        self.restart_clock()
+        self.result_saved = False
+        self.renderer.invalidate()
+        return True
+
+    def profiled_methods(self):
+        # (objeto, método, fase) medidos enquanto o profiler está ligado
+        targets = [(self, name, name) for name in PROFILED_GAME_METHODS]
+        targets.append((self.renderer, "present", "flip"))
+        targets.append((self.engine, "get_ai_move", "ai"))
+        return targets
+
+    def set_profiling(self, enabled):
+        if enabled:
+            self.profiler.enable(self.profiled_methods())
+        else:
+            self.profiler.disable()
+
+    def toggle_hud(self):
+        # F3: mostra o painel e liga as medições; ao esconder, as medições
+        # continuam só se foram pedidas com --profile
+        self.show_hud = not self.show_hud
+        self.hud = None
+        self.set_profiling(self.show_hud or self.profile_path is not None)
+
+    def tick_interval(self):
+        return effect_interval(DIFFICULTY_LEVELS[self.difficulty_name][0], self.engine.effects,
+                               self.turbo_timer > 0)
+
+    def queue_turn(self, direction):
+        # Valida contra a última direção da fila, para que duas viradas
+        # rápidas no mesmo tick (ex.: cima e depois esquerda) não se percam
+        last = self.pending_turns[-1] if self.pending_turns else self.engine.direction
+        if direction != last and direction != OPPOSITE[last] and len(self.pending_turns) < MAX_QUEUED_TURNS:
+            self.pending_turns.append(direction)
+
+    def restart_clock(self):
+        # Ao (re)entrar no jogo: os menus não chamam clock.tick(), então o
+        # tempo passado fora dele é descartado aqui e não vira ticks atrasados
+        self.clock.tick()
+        self.accumulator = 0
+
+    def advance(self, elapsed):
+        # Passo fixo: roda quantos ticks couberem no tempo decorrido
+        self.accumulator += elapsed
+        ticks = 0
+        while not self.engine.game_over:
+            interval = self.tick_interval()
+            if self.accumulator < interval:
+                break
+            if ticks == MAX_TICKS_PER_FRAME:
+                self.accumulator = 0
+                break
+            if self.pending_turns:
+                direction = self.pending_turns.popleft()
+            elif self.autopilot is not None:
+                direction = self.autopilot(self.engine)
+            else:
+                direction = None
+            self.renderer.apply(self.engine.step(direction))
+            self.recorder.record()
+            self.accumulator -= interval
+            self.turbo_timer = max(0, self.turbo_timer - interval)
+            ticks += 1
+        return min(1.0, self.accumulator / self.tick_interval())
+
+    def draw_grid(self, surface):
         for x in range(0, SCREEN_WIDTH, GRID_SIZE):
-            pygame.draw.line(self.screen, self.current_theme["border"], (x, 0), (x, SCREEN_HEIGHT))
+            pygame.draw.line(surface, self.current_theme["border"], (x, 0), (x, SCREEN_HEIGHT))
         for y in range(0, SCREEN_HEIGHT, GRID_SIZE):
-            pygame.draw.line(self.screen, self.current_theme["border"], (0, y), (SCREEN_WIDTH, y))
-
-    def draw_snake(self):
-        for i, segment in enumerate(self.snake):
+            pygame.draw.line(surface, self.current_theme["border"], (0, y), (SCREEN_WIDTH, y))
+
+    def sprite_atlas(self):
+        # Atlas do tema atual, refeito só quando o tema muda
+        if self.atlas is None or self.atlas.theme is not self.current_theme:
+            self.atlas = SpriteAtlas(self.current_theme, self.renderer.background())
+        return self.atlas
+
+    def segment_position(self, index):
+        # Distância do segmento da cobra do jogador até a cabeça. Cabeça,
+        # pescoço e cauda (o que muda a cada tick) saem direto; o resto vem de
+        # um mapa montado no máximo uma vez por tick.
+        snake = self.engine.snake
+        if index == snake[0]:
+            return 0
+        if len(snake) > 1 and index == snake[1]:
+            return 1
+        if index == snake[-1]:
+            return len(snake) - 1
+        cache = self.segments
+        if cache is None or cache[0] is not snake or cache[1] != self.engine.ticks:
+            cache = self.segments = (snake, self.engine.ticks,
+                                     {cell: i for i, cell in enumerate(snake)})
+        return cache[2][index]
+
+    def cell_sprite(self, index, tag):
+        # Sprite de uma célula ocupada conforme a grade de ocupação
+        engine = self.engine
+        atlas = self.sprite_atlas()
+        if tag == CELL_SNAKE:
+            head = index == engine.snake[0]
+            if engine.mode == COLORFUL_MODE:
+                hue = (engine.ticks - self.segment_position(index)) % COLORFUL_STEPS
+                return atlas.rainbow_heads[engine.direction][hue] if head else atlas.rainbow[hue]
+            return atlas.heads[engine.direction] if head else atlas.snake
+        if tag == CELL_AI:
+            if engine.owner is not None:
+                snake = engine.owner[index]
+                head, body = atlas.arena[snake % len(atlas.arena)]
+                return head if index == engine.ai_snakes[snake][0] else body
+            return atlas.ai_head if index == engine.ai_snake[0] else atlas.ai_body
+        return atlas.static[tag]
+
+    def draw_head(self, row, col, offset=(0, 0)):
+        x, y = self.camera.origin(row, col)
+        self.screen.blit(self.cell_sprite(self.engine.snake[0], CELL_SNAKE), (x + offset[0], y + offset[1]))
+
+    def draw_cell(self, index):
+        # Desenha o conteúdo de uma célula conforme a grade de ocupação
+        row, col = self.engine.to_cell(index)
+        if not self.camera.contains(row, col):
+            return
+        tag = self.engine.grid[index]
+        if tag != CELL_EMPTY:
+            self.screen.blit(self.cell_sprite(index, tag), self.camera.origin(row, col))
+
+    def draw_sliding_head(self, tag, index, prev, alpha):
+        # Cabeça a caminho da célula nova: alpha=0 na célula anterior, 1 na nova
+        row, col = self.engine.to_cell(index)
+        prev_row, prev_col = self.engine.to_cell(prev)
+        if abs(row - prev_row) + abs(col - prev_col) != 1:
+            self.draw_cell(index)
+            return
+        x, y = self.camera.origin(row, col)
+        x += int((prev_col - col) * (1 - alpha) * GRID_SIZE)
+        y += int((prev_row - row) * (1 - alpha) * GRID_SIZE)
+        self.screen.blit(self.cell_sprite(index, tag), (x, y))
+
+    def draw_shrinking_tail(self, tag, vacated, tail, alpha):
+        # Pedaço da cauda que ainda não saiu da célula liberada
+        row, col = self.engine.to_cell(vacated)
+        tail_row, tail_col = self.engine.to_cell(tail)
+        keep = int((1 - alpha) * GRID_SIZE)
+        if keep <= 0 or abs(row - tail_row) + abs(col - tail_col) != 1:
+            return
+        x, y = self.camera.origin(row, col)
+        if tail_col > col:
+            rect = (x + GRID_SIZE - keep, y, keep, GRID_SIZE)
+        elif tail_col < col:
+            rect = (x, y, keep, GRID_SIZE)
+        elif tail_row > row:
+            rect = (x, y + GRID_SIZE - keep, GRID_SIZE, keep)
+        else:
+            rect = (x, y, GRID_SIZE, keep)
+        if tag != CELL_SNAKE:
+            color = COLORS["DARK_RED"]
+        elif self.engine.mode == COLORFUL_MODE:
+            # A célula liberada tinha o tom de um tick antes da cauda atual
+            color = self.sprite_atlas().palette[(self.engine.ticks - len(self.engine.snake)) % COLORFUL_STEPS]
+        else:
             color = self.current_theme["snake"]
-            if i == 0:  # Cabeça
-                pygame.draw.rect(self.screen, color, 
-                               (segment[1]*GRID_SIZE, segment[0]*GRID_SIZE, GRID_SIZE, GRID_SIZE))
-                # Desenha os olhos
-                eye_size = GRID_SIZE // 4
-                if self.direction == "RIGHT":
-                    pygame.draw.circle(self.screen, COLORS["BLACK"], 
-                                     (segment[1]*GRID_SIZE + GRID_SIZE - eye_size, 
-                                      segment[0]*GRID_SIZE + eye_size), eye_size)
-                    pygame.draw.circle(self.screen, COLORS["BLACK"], 
-                                     (segment[1]*GRID_SIZE + GRID_SIZE - eye_size, 
-                                      segment[0]*GRID_SIZE + GRID_SIZE - eye_size), eye_size)
-                elif self.direction == "LEFT":
-                    pygame.draw.circle(self.screen, COLORS["BLACK"], 
-                                     (segment[1]*GRID_SIZE + eye_size, 
-                                      segment[0]*GRID_SIZE + eye_size), eye_size)
-                    pygame.draw.circle(self.screen, COLORS["BLACK"], 
-                                     (segment[1]*GRID_SIZE + eye_size, 
-                                      segment[0]*GRID_SIZE + GRID_SIZE - eye_size), eye_size)
-                elif self.direction == "UP":
-                    pygame.draw.circle(self.screen, COLORS["BLACK"], 
-                                     (segment[1]*GRID_SIZE + eye_size, 
-                                      segment[0]*GRID_SIZE + eye_size), eye_size)
-                    pygame.draw.circle(self.screen, COLORS["BLACK"], 
-                                     (segment[1]*GRID_SIZE + GRID_SIZE - eye_size, 
-                                      segment[0]*GRID_SIZE + eye_size), eye_size)
-                elif self.direction == "DOWN":
-                    pygame.draw.circle(self.screen, COLORS["BLACK"], 
-                                     (segment[1]*GRID_SIZE + eye_size, 
-                                      segment[0]*GRID_SIZE + GRID_SIZE - eye_size), eye_size)
-                    pygame.draw.circle(self.screen, COLORS["BLACK"], 
-                                     (segment[1]*GRID_SIZE + GRID_SIZE - eye_size, 
-                                      segment[0]*GRID_SIZE + GRID_SIZE - eye_size), eye_size)
-            else:  # Corpo
-                pygame.draw.rect(self.screen, color, 
-                               (segment[1]*GRID_SIZE, segment[0]*GRID_SIZE, GRID_SIZE, GRID_SIZE))
-
-    def draw_ai_snake(self):
-        if self.ai_snake:
-            for i, segment in enumerate(self.ai_snake):
-                color = COLORS["RED"] if i == 0 else COLORS["DARK_RED"]
-                pygame.draw.rect(self.screen, color, 
-                               (segment[1]*GRID_SIZE, segment[0]*GRID_SIZE, GRID_SIZE, GRID_SIZE))
-
-    def draw_food(self):
-        pygame.draw.circle(self.screen, self.current_theme["food"],
-                         (self.food[1]*GRID_SIZE + GRID_SIZE//2,
-                          self.food[0]*GRID_SIZE + GRID_SIZE//2),
-                         GRID_SIZE//2)
-
-    def draw_powerups(self):
-        for powerup in self.powerups:
-            pygame.draw.circle(self.screen, self.current_theme["powerup"],
-                             (powerup[1]*GRID_SIZE + GRID_SIZE//2,
-                              powerup[0]*GRID_SIZE + GRID_SIZE//2),
-                             GRID_SIZE//2)
-
-    def draw_obstacles(self):
-        for obstacle in self.obstacles:
-            pygame.draw.rect(self.screen, self.current_theme["obstacle"],
-                           (obstacle[1]*GRID_SIZE, obstacle[0]*GRID_SIZE,
-                            GRID_SIZE, GRID_SIZE))
+        pygame.draw.rect(self.screen, color, rect)
+
+    def draw_visible(self):
+        # Desenha cobras, comida, obstáculos e power-ups lendo da grade de
+        # ocupação só as linhas e colunas dentro da câmera: o custo depende
+        # do tamanho da tela, não do tabuleiro nem das cobras. Os sprites de
+        # todas as células vão para a tela numa única chamada de blits, com
+        # cada sequência de um mesmo sprite sólido (corpo, obstáculos) numa
+        # linha desenhada de uma vez a partir da faixa dele.
+        engine = self.engine
+        camera = self.camera
+        atlas = self.sprite_atlas()
+        static = atlas.static
+        strips = atlas.strips
+        cell_sprite = self.cell_sprite
+        batch = []
+        cols = min(camera.cols, engine.width - camera.col)
+        for row in range(camera.row, min(camera.row + camera.rows, engine.height)):
+            start = row * engine.width + camera.col
+            y = (row - camera.row) * GRID_SIZE
+            run = None
+            run_x = 0
+            for offset, tag in enumerate(engine.grid[start:start + cols]):
+                sprite = None
+                if tag != CELL_EMPTY:
+                    sprite = static[tag] or cell_sprite(start + offset, tag)
+                if run is not None:
+                    if sprite is run:
+                        continue
+                    batch.append((strips[run], (run_x, y), (0, 0, offset * GRID_SIZE - run_x, GRID_SIZE)))
+                    run = None
+                if sprite is None:
+                    continue
+                if sprite in strips:
+                    run = sprite
+                    run_x = offset * GRID_SIZE
+                else:
+                    batch.append((sprite, (offset * GRID_SIZE, y)))
+            if run is not None:
+                batch.append((strips[run], (run_x, y), (0, 0, cols * GRID_SIZE - run_x, GRID_SIZE)))
+        self.screen.blits(batch, doreturn=False)
+
+    def score_text(self):
+        score_text = f"Score: {self.engine.score}"
+        if self.engine.ai_snake:
+            score_text += f" | IA: {self.engine.ai_score}"
+        elif self.engine.ai_snakes:
+            score_text += f" | Arena: {len(self.engine.ai_snakes)} cobras"
+        score_text += f" | Recorde: {self.max_score}"
+        # Efeitos em andamento e, por alguns ticks, o do power-up recém-pego
+        labels = [POWERUP_LABELS[effect] for effect in self.engine.effects]
+        if self.effect_message is not None:
+            label, until = self.effect_message
+            if self.engine.ticks < until and label not in labels:
+                labels.append(label)
+        if labels:
+            score_text += " | " + ", ".join(labels)
+        return score_text
 
     def draw_score(self):
-        score_text = f"Score: {self.score}"
-        if self.ai_snake:
-            score_text += f" | IA: {self.ai_score}"
-        score_text += f" | Recorde: {self.max_score}"
-        score_surface = self.font.render(score_text, True, self.current_theme["score"])
-        self.screen.blit(score_surface, (10, 10))
+        score_surface = self.text_cache.render(self.font, self.score_text(), self.current_theme["score"])
+        self.screen.blit(score_surface, SCORE_POSITION)
+        return score_surface.get_rect(topleft=SCORE_POSITION)
+
+    def hud_surface(self):
+        # Painel de desempenho, ou None quando escondido
+        if not self.show_hud:
+            return None
+        if self.hud is None or self.profiler.frames - self.hud_frame >= HUD_REFRESH:
+            self.hud = self.draw_hud()
+            self.hud_frame = self.profiler.frames
+        return self.hud
+
+    def draw_hud(self):
+        if self.hud_font is None:
+            self.hud_font = pygame.font.Font(None, 20)
+        stats = self.profiler.stats()
+        lines = [(f"{stats['fps']:.0f} fps  {stats['ticks_per_sec']:.1f} ticks/s", "", ""),
+                 (f"lentos: {stats['over_budget']}", "p50", "p99")]
+        phases = sorted(stats["phases"].items(), key=lambda item: -item[1]["p99"])
+        for phase, row in phases[:HUD_LINES]:
+            lines.append((phase, f"{row['p50']:.2f}", f"{row['p99']:.2f}"))
+
+        line_height = self.hud_font.get_linesize()
+        surface = pygame.Surface((250, len(lines) * line_height + 8)).convert()
+        surface.fill((20, 20, 20))
+        for i, (name, p50, p99) in enumerate(lines):
+            y = 4 + i * line_height
+            surface.blit(self.hud_font.render(name, True, COLORS["WHITE"]), (6, y))
+            # Números alinhados à direita das colunas
+            for text, right in ((p50, 190), (p99, 244)):
+                if text:
+                    label = self.hud_font.render(text, True, COLORS["YELLOW"])
+                    surface.blit(label, (right - label.get_width(), y))
+        return surface
+
+    def overlay_surface(self):
+        size = self.screen.get_size()
+        overlay = self.overlays.get(size)
+        if overlay is None:
+            overlay = pygame.Surface(size)
+            overlay.set_alpha(128)
+            overlay.fill(COLORS["BLACK"])
+            self.overlays[size] = overlay
+        return overlay
 
     def draw_game_over(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(128)
-        overlay.fill(COLORS["BLACK"])
-        self.screen.blit(overlay, (0, 0))
-
-        game_over_text = self.font.render("GAME OVER!", True, COLORS["RED"])
-        score_text = self.font.render(f"Pontuação: {self.score}", True, COLORS["WHITE"])
-        record_text = self.font.render(f"Recorde: {self.max_score}", True, COLORS["WHITE"])
+        self.screen.blit(self.overlay_surface(), (0, 0))
+
+        game_over_text = self.text_cache.render(self.font, "GAME OVER!", COLORS["RED"])
+        score_text = self.text_cache.render(self.font, f"Pontuação: {self.engine.score}", COLORS["WHITE"])
+        record_text = self.text_cache.render(self.font, f"Recorde: {self.max_score}", COLORS["WHITE"])
         
         self.screen.blit(game_over_text, 
                         (SCREEN_WIDTH//2 - game_over_text.get_width()//2, SCREEN_HEIGHT//2 - 60))
@@ -256,19 +989,44 @@ class SnakeGame:
                         (SCREEN_WIDTH//2 - record_text.get_width()//2, SCREEN_HEIGHT//2 + 40))
 
     def draw_pause(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(128)
-        overlay.fill(COLORS["BLACK"])
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.overlay_surface(), (0, 0))
 
-        pause_text = self.font.render("PAUSA", True, COLORS["WHITE"])
+        pause_text = self.text_cache.render(self.font, "PAUSA", COLORS["WHITE"])
         self.screen.blit(pause_text, 
                         (SCREEN_WIDTH//2 - pause_text.get_width()//2, SCREEN_HEIGHT//2))
+        lines = []
+        # Só a partida gravada pelo recorder pode ser salva (não um replay
+        # nem um jogo do servidor)
+        if self.engine is self.recorder.engine:
+            lines.append("F5: Salvar   F9: Carregar")
+        if self.pause_message:
+            lines.append(self.pause_message)
+        y = SCREEN_HEIGHT//2 + 50
+        for line in lines:
+            text = self.text_cache.render(self.small_font, line, COLORS["WHITE"])
+            self.screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, y))
+            y += 30
+
+    def show_error(self, title, detail):
+        # Tela de erro até uma tecla, um clique ou o fechamento da janela;
+        # sem janela (--headless) ninguém a veria, então não espera
+        if self.headless:
+            return
+        self.screen.fill(self.current_theme["background"])
+        title_text = self.text_cache.render(self.font, title, COLORS["RED"])
+        detail_text = self.text_cache.render(self.small_font, detail, self.current_theme["text"])
+        hint_text = self.text_cache.render(self.small_font, "Pressione qualquer tecla", self.current_theme["text"])
+        self.screen.blit(title_text, (SCREEN_WIDTH//2 - title_text.get_width()//2, SCREEN_HEIGHT//2 - 60))
+        self.screen.blit(detail_text, (SCREEN_WIDTH//2 - detail_text.get_width()//2, SCREEN_HEIGHT//2))
+        self.screen.blit(hint_text, (SCREEN_WIDTH//2 - hint_text.get_width()//2, SCREEN_HEIGHT//2 + 50))
+        pygame.display.flip()
+        while pygame.event.wait().type not in (pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+            pass
 
     def draw_main_menu(self):
         self.screen.fill(self.current_theme["background"])
         
-        title = self.font.render("🐍 JOGO DA COBRINHA 🐍", True, self.current_theme["text"])
+        title = self.text_cache.render(self.font, "🐍 JOGO DA COBRINHA 🐍", self.current_theme["text"])
         self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
 
         menu_options = [
@@ -291,19 +1049,22 @@ class SnakeGame:
     def draw_settings(self):
         self.screen.fill(self.current_theme["background"])
         
-        title = self.font.render("⚙️ CONFIGURAÇÕES ⚙️", True, self.current_theme["text"])
+        title = self.text_cache.render(self.font, "⚙️ CONFIGURAÇÕES ⚙️", self.current_theme["text"])
         self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
 
         settings_options = [
             "🌙 Tema Escuro",
             "☀️ Tema Claro",
             "🎨 Tema Neon",
+            self.mode_name,
+            self.difficulty_name,
+            self.board_name,
             "🔙 Voltar"
         ]
 
         buttons = []
         for i, option in enumerate(settings_options):
-            button = Button(SCREEN_WIDTH//2 - 100, 150 + i*60, 200, 50, option,
+            button = Button(SCREEN_WIDTH//2 - 150, 150 + i*60, 300, 50, option,
                           self.current_theme["menu"], COLORS["DARK_BLUE"])
             buttons.append(button)
             button.draw(self.screen)
@@ -313,22 +1074,20 @@ class SnakeGame:
     def draw_ranking(self):
         self.screen.fill(self.current_theme["background"])
         
-        title = self.font.render("🏆 RANKING 🏆", True, self.current_theme["text"])
+        title = self.text_cache.render(self.font, "🏆 RANKING 🏆", self.current_theme["text"])
         self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
 
-        try:
-            with open("ranking.txt", "r") as f:
-                scores = [int(line.strip()) for line in f.readlines() if line.strip().isdigit()]
-                scores.sort(reverse=True)
-                scores = scores[:5]  # Top 5 scores
-        except:
-            scores = []
+        subtitle = self.text_cache.render(self.small_font, f"{self.mode_name} | {self.difficulty_name}",
+                                          self.current_theme["text"])
+        self.screen.blit(subtitle, (SCREEN_WIDTH//2 - subtitle.get_width()//2, 95))
+
+        scores = self.scores.top(GAME_MODES[self.mode_name], self.difficulty_name, 5)  # Top 5 scores
 
         y = 150
         for i, score in enumerate(scores):
             medal = "🥇" if i == 0 else "🥈" if i == 1 else "🥉" if i == 2 else f"{i+1}."
             score_text = f"{medal} {score:>5} pontos"
-            text = self.font.render(score_text, True, self.current_theme["text"])
+            text = self.text_cache.render(self.font, score_text, self.current_theme["text"])
             self.screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, y))
             y += 60
 
@@ -341,14 +1100,16 @@ class SnakeGame:
     def draw_help(self):
         self.screen.fill(self.current_theme["background"])
         
-        title = self.font.render("❓ AJUDA ❓", True, self.current_theme["text"])
+        title = self.text_cache.render(self.font, "❓ AJUDA ❓", self.current_theme["text"])
         self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
 
         help_text = [
             "Comandos do Jogo:",
             "  ↑, ↓, ←, → ou WASD: Mover",
             "  P: Pausar/Despausar",
+            "  F5/F9 (pausado): Salvar/Carregar jogo",
             "  T: Modo Turbo (temporário)",
+            "  F3: Painel de desempenho",
             "  H: Mostrar esta ajuda",
             "  Q: Sair do jogo",
             "  R: Reiniciar jogo",
@@ -361,11 +1122,11 @@ class SnakeGame:
             "  ⏰: Desacelerar"
         ]
 
-        y = 150
+        y = 140
         for line in help_text:
-            text = self.small_font.render(line, True, self.current_theme["text"])
+            text = self.text_cache.render(self.small_font, line, self.current_theme["text"])
             self.screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, y))
-            y += 30
+            y += 24
 
         back_button = Button(SCREEN_WIDTH//2 - 100, y + 20, 200, 50, "🔙 Voltar",
                            self.current_theme["menu"], COLORS["DARK_BLUE"])
@@ -373,35 +1134,192 @@ class SnakeGame:
 
         return [back_button]
 
+    def show_screen(self, name):
+        # Mostra uma tela de menu a partir do cache e devolve seus botões
+        cached = self.screen_cache.get(name)
+        if cached is None:
+            draw = {
+                "menu": self.draw_main_menu,
+                "settings": self.draw_settings,
+                "ranking": self.draw_ranking,
+                "help": self.draw_help
+            }[name]
+            buttons = draw()
+            cached = (self.screen.copy(), buttons)
+            self.screen_cache[name] = cached
+
+        surface, buttons = cached
+        self.screen.blit(surface, (0, 0))
+        mouse_pos = pygame.mouse.get_pos()
+        for button in buttons:
+            button.is_hovered = button.rect.collidepoint(mouse_pos)
+            if button.is_hovered:
+                button.draw(self.screen)
+        pygame.display.flip()
+        return buttons
+
+    def wait_menu_events(self, buttons):
+        # Dorme até chegar alguma entrada e redesenha só os botões cujo
+        # destaque mudou, em vez de redesenhar a tela a cada quadro
+        events = [pygame.event.wait()] + pygame.event.get()
+        changed = []
+        for event in events:
+            if event.type == pygame.MOUSEMOTION:
+                for button in buttons:
+                    hovered = button.rect.collidepoint(event.pos)
+                    if hovered != button.is_hovered:
+                        button.is_hovered = hovered
+                        button.draw(self.screen)
+                        changed.append(button.rect)
+        if changed:
+            pygame.display.update(changed)
+        return events
+
     def load_record(self):
-        try:
-            with open("record.txt", "r") as f:
-                return int(f.read())
-        except:
-            return 0
+        return self.scores.best()
 
     def save_record(self):
-        if self.score > self.max_score:
-            with open("record.txt", "w") as f:
-                f.write(str(self.score))
+        # Registra a partida uma única vez, quando ela termina
+        if self.result_saved or self.autopilot is not None:
+            return
+        self.result_saved = True
+        score = self.engine.score
+        if score > self.scores.best():
+            self.worker.notify("🏆 Novo recorde!", f"{score} pontos no {self.mode_name}")
+        self.scores.add(score, GAME_MODES[self.mode_name], self.difficulty_name)
+        self.worker.submit(self.scores.flush)
+        self.screen_cache.pop("ranking", None)
+        self.save_replay()
+
+    def save_replay(self):
+        # O replay é serializado aqui e gravado na thread de fundo
+        name = f"{datetime.now():%Y%m%d-%H%M%S}-{self.engine.score}.snkr"
+        self.worker.submit(self.write_replay, os.path.join(REPLAY_DIR, name), self.recorder.to_bytes())
+
+    def write_replay(self, path, data):
+        try:
+            os.makedirs(REPLAY_DIR, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+        except OSError as error:
+            logging.getLogger(__name__).warning("Não foi possível salvar o replay: %s", error)
+
+    def play_replay(self, path, speed=1.0):
+        # Reproduz um replay na tela. Espaço pausa, +/- mudam a velocidade,
+        # setas avançam ou voltam 50 ticks, Esc sai.
+        try:
+            player = ReplayPlayer.load(path)
+        except (OSError, ReplayError) as error:
+            logging.getLogger(__name__).warning("Não foi possível abrir o replay: %s", error)
+            self.show_error("Replay inválido", str(error))
+            pygame.quit()
+            return
+        base_interval = DIFFICULTY_LEVELS.get(player.header.get("difficulty"), (100, 1))[0]
+        self.engine = player.engine
+        self.max_score = player.header["score"]
+        self.renderer.invalidate()
+        accumulator = 0
+        paused = False
+        running = True
+        while running:
+            seek_to = None
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    if event.key in (pygame.K_ESCAPE, pygame.K_q):
+                        running = False
+                    elif event.key in (pygame.K_SPACE, pygame.K_p):
+                        paused = not paused
+                    elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                        speed = min(speed * 2, 256)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        speed = max(speed / 2, 1 / 8)
+                    elif event.key == pygame.K_RIGHT:
+                        seek_to = self.engine.ticks + 50
+                    elif event.key == pygame.K_LEFT:
+                        seek_to = self.engine.ticks - 50
+
+            if seek_to is not None:
+                self.engine = player.seek(seek_to)
+                self.renderer.invalidate()
+                accumulator = 0
+
+            elapsed = min(self.clock.tick(RENDER_FPS), 250)
+            # Turbo e lento dos power-ups também valem no replay
+            interval = effect_interval(base_interval, self.engine.effects)
+            if not paused:
+                accumulator += elapsed * speed
+                while accumulator >= interval:
+                    events = player.step()
+                    if events is None:
+                        accumulator = 0
+                        # Sem janela não há quem aperte Esc
+                        running = not self.headless
+                        break
+                    self.renderer.apply(events)
+                    accumulator -= interval
+                    interval = effect_interval(base_interval, self.engine.effects)
+
+            if self.engine.game_over:
+                self.renderer.render("game_over")
+            elif paused:
+                self.renderer.render("pause")
+            else:
+                self.renderer.render(alpha=min(1.0, accumulator / interval))
+        pygame.quit()
+
+    def play_remote(self, address):
+        # Cliente fino do snake_server.py: a simulação roda no servidor e aqui
+        # só se aplicam os deltas recebidos e se enviam as viradas. Esc sai.
+        from snake_server import ServerConnection, DEFAULT_PORT
+
+        host, _, port = address.rpartition(":")
+        connection = ServerConnection(host or "127.0.0.1", int(port or DEFAULT_PORT))
+        game = connection.game
+        self.engine = game.engine
+        self.max_score = self.load_record()
+        self.renderer.invalidate()
+        since_tick = 0
+        running = True
+        while running and not connection.closed:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    if event.key in (pygame.K_ESCAPE, pygame.K_q):
+                        running = False
+                    elif event.key in KEY_DIRECTIONS:
+                        connection.send_turn(KEY_DIRECTIONS[event.key])
+
+            since_tick += min(self.clock.tick(RENDER_FPS), 250)
+            for events in connection.poll():
+                if events is None:
+                    # Retrato: partida nova ou cliente que ficou para trás
+                    self.engine = game.engine
+                    self.renderer.invalidate()
+                else:
+                    self.renderer.apply(events)
+                since_tick = 0
+
+            if self.engine.game_over:
+                self.renderer.render("game_over")
+            else:
+                self.renderer.render(alpha=min(1.0, since_tick / game.header["tick_ms"]))
+        connection.close()
+        pygame.quit()
 
-    def run(self):
+    def run(self, current_screen="menu"):
+        # current_screen: menu, settings, ranking, help ou game
         running = True
         in_menu = True
-        current_screen = "menu"  # menu, settings, ranking, help
 
         while running:
             if current_screen == "menu":
-                buttons = self.draw_main_menu()
-                pygame.display.flip()
+                buttons = self.show_screen("menu")
                 menu_active = True
                 while menu_active:
-                    mouse_pos = pygame.mouse.get_pos()
-                    for button in buttons:
-                        button.is_hovered = button.rect.collidepoint(mouse_pos)
-                    self.draw_main_menu()
-                    pygame.display.flip()
-                    for event in pygame.event.get():
+                    for event in self.wait_menu_events(buttons):
                         if event.type == pygame.QUIT:
                             running = False
                             menu_active = False
@@ -423,19 +1341,13 @@ class SnakeGame:
                                 elif button.text == "🚪 SAIR":
                                     running = False
                                     menu_active = False
-                    self.clock.tick(60)
 
             elif current_screen == "settings":
-                buttons = self.draw_settings()
-                pygame.display.flip()
+                buttons = self.show_screen("settings")
                 settings_active = True
                 while settings_active:
-                    mouse_pos = pygame.mouse.get_pos()
-                    for button in buttons:
-                        button.is_hovered = button.rect.collidepoint(mouse_pos)
-                    self.draw_settings()
-                    pygame.display.flip()
-                    for event in pygame.event.get():
+                    changed = False
+                    for event in self.wait_menu_events(buttons):
                         if event.type == pygame.QUIT:
                             running = False
                             settings_active = False
@@ -443,26 +1355,40 @@ class SnakeGame:
                             if button.handle_event(event):
                                 if button.text == "🌙 Tema Escuro":
                                     self.current_theme = THEMES["🌙 Escuro"]
+                                    changed = True
                                 elif button.text == "☀️ Tema Claro":
                                     self.current_theme = THEMES["☀️ Claro"]
+                                    changed = True
                                 elif button.text == "🎨 Tema Neon":
                                     self.current_theme = THEMES["🎨 Neon"]
+                                    changed = True
+                                elif button.text in GAME_MODES:
+                                    # Alterna para o próximo modo de jogo
+                                    modes = list(GAME_MODES)
+                                    self.mode_name = modes[(modes.index(self.mode_name) + 1) % len(modes)]
+                                    changed = True
+                                elif button.text in DIFFICULTY_LEVELS:
+                                    levels = list(DIFFICULTY_LEVELS)
+                                    self.difficulty_name = levels[(levels.index(self.difficulty_name) + 1) % len(levels)]
+                                    changed = True
+                                elif button.text in BOARD_SIZES:
+                                    sizes = list(BOARD_SIZES)
+                                    self.board_name = sizes[(sizes.index(self.board_name) + 1) % len(sizes)]
+                                    changed = True
                                 elif button.text == "🔙 Voltar":
                                     current_screen = "menu"
                                     settings_active = False
-                    self.clock.tick(60)
+                    if changed:
+                        # Tema ou modo mudou: todas as telas em cache ficaram velhas
+                        self.screen_cache.clear()
+                        if settings_active:
+                            buttons = self.show_screen("settings")
 
             elif current_screen == "ranking":
-                buttons = self.draw_ranking()
-                pygame.display.flip()
+                buttons = self.show_screen("ranking")
                 ranking_active = True
                 while ranking_active:
-                    mouse_pos = pygame.mouse.get_pos()
-                    for button in buttons:
-                        button.is_hovered = button.rect.collidepoint(mouse_pos)
-                    self.draw_ranking()
-                    pygame.display.flip()
-                    for event in pygame.event.get():
+                    for event in self.wait_menu_events(buttons):
                         if event.type == pygame.QUIT:
                             running = False
                             ranking_active = False
@@ -471,19 +1397,12 @@ class SnakeGame:
                                 if button.text == "🔙 Voltar":
                                     current_screen = "menu"
                                     ranking_active = False
-                    self.clock.tick(60)
 
             elif current_screen == "help":
-                buttons = self.draw_help()
-                pygame.display.flip()
+                buttons = self.show_screen("help")
                 help_active = True
                 while help_active:
-                    mouse_pos = pygame.mouse.get_pos()
-                    for button in buttons:
-                        button.is_hovered = button.rect.collidepoint(mouse_pos)
-                    self.draw_help()
-                    pygame.display.flip()
-                    for event in pygame.event.get():
+                    for event in self.wait_menu_events(buttons):
                         if event.type == pygame.QUIT:
                             running = False
                             help_active = False
@@ -492,139 +1411,136 @@ class SnakeGame:
                                 if button.text == "🔙 Voltar":
                                     current_screen = "menu"
                                     help_active = False
-                    self.clock.tick(60)
 
             elif current_screen == "game":
+                profiler = self.profiler
+                if profiler.enabled:
+                    profiler.begin_frame()
+                    ticks = self.engine.ticks
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
                         running = False
                     elif event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_UP and self.direction != "DOWN":
-                            self.direction = "UP"
-                        elif event.key == pygame.K_DOWN and self.direction != "UP":
-                            self.direction = "DOWN"
-                        elif event.key == pygame.K_LEFT and self.direction != "RIGHT":
-                            self.direction = "LEFT"
-                        elif event.key == pygame.K_RIGHT and self.direction != "LEFT":
-                            self.direction = "RIGHT"
+                        if event.key in KEY_DIRECTIONS:
+                            self.queue_turn(KEY_DIRECTIONS[event.key])
+                        elif event.key == pygame.K_t:
+                            self.turbo_timer = TURBO_DURATION
+                        elif event.key == pygame.K_F3:
+                            self.toggle_hud()
+                            if profiler.enabled:
+                                profiler.begin_frame()
+                                ticks = self.engine.ticks
                         elif event.key == pygame.K_p:
                             self.paused = not self.paused
-                        elif event.key == pygame.K_r and self.game_over:
+                            self.pause_message = None
+                            if not self.paused:
+                                self.restart_clock()
+                        elif event.key == pygame.K_F5 and self.paused:
+                            self.pause_message = "Jogo salvo" if self.save_game() else "Erro ao salvar"
+                            self.renderer.full_redraw = True
+                        elif event.key == pygame.K_F9 and self.paused:
+                            self.pause_message = ("Jogo carregado" if self.load_game()
+                                                  else "Nenhum jogo salvo válido")
+                            self.renderer.full_redraw = True
+                        elif event.key == pygame.K_r and self.engine.game_over:
                             self.reset_game()
-                        elif event.key == pygame.K_m and self.game_over:
+                        elif event.key == pygame.K_m and self.engine.game_over:
                             current_screen = "menu"
 
-                if not self.paused and not self.game_over:
-                    # Atualiza a posição da cobra
-                    new_head = self.snake[0].copy()
-                    if self.direction == "UP":
-                        new_head[0] -= 1
-                    elif self.direction == "DOWN":
-                        new_head[0] += 1
-                    elif self.direction == "LEFT":
-                        new_head[1] -= 1
-                    elif self.direction == "RIGHT":
-                        new_head[1] += 1
-
-                    # Verifica colisão com as bordas
-                    if (new_head[0] < 0 or new_head[0] >= GRID_HEIGHT or
-                        new_head[1] < 0 or new_head[1] >= GRID_WIDTH):
-                        self.game_over = True
-                        continue
-
-                    # Verifica colisão com a própria cobra
-                    if new_head in self.snake[1:]:
-                        self.game_over = True
-                        continue
-
-                    # Verifica colisão com obstáculos
-                    if new_head in self.obstacles:
-                        self.game_over = True
-                        continue
-
-                    # Verifica colisão com a cobra da IA
-                    if self.ai_snake and new_head in self.ai_snake:
-                        self.game_over = True
-                        continue
+                if profiler.enabled:
+                    profiler.lap("events")
 
-                    self.snake.insert(0, new_head)
-
-                    # Verifica se comeu a comida
-                    if new_head == self.food:
-                        self.score += 1
-                        self.food = self.generate_food()
-                        if random.random() < 0.2:
-                            self.powerups.append(self.generate_food())
-                    else:
-                        self.snake.pop()
-
-                    # Atualiza a cobra da IA
-                    if self.ai_snake:
-                        ai_direction = self.get_ai_move()
-                        ai_new_head = self.ai_snake[0].copy()
-                        if ai_direction == "UP":
-                            ai_new_head[0] -= 1
-                        elif ai_direction == "DOWN":
-                            ai_new_head[0] += 1
-                        elif ai_direction == "LEFT":
-                            ai_new_head[1] -= 1
-                        elif ai_direction == "RIGHT":
-                            ai_new_head[1] += 1
-
-                        if (0 <= ai_new_head[0] < GRID_HEIGHT and
-                            0 <= ai_new_head[1] < GRID_WIDTH and
-                            ai_new_head not in self.ai_snake[1:] and
-                            ai_new_head not in self.obstacles and
-                            ai_new_head not in self.snake):
-                            self.ai_snake.insert(0, ai_new_head)
-                            if ai_new_head == self.food:
-                                self.ai_score += 1
-                                self.food = self.generate_food()
-                            else:
-                                self.ai_snake.pop()
+                # restart_clock() descarta o tempo gasto fora do jogo (menus,
+                # pausa); o limite só cobre quadros travados no meio da partida
+                elapsed = min(self.clock.tick(RENDER_FPS), 250)
+                if profiler.enabled:
+                    profiler.lap(None)
+                alpha = 1.0
+                if not self.paused and not self.engine.game_over:
+                    alpha = self.advance(elapsed)
+                if profiler.enabled:
+                    profiler.lap("step")
 
                 # Desenha o jogo
-                self.screen.fill(self.current_theme["background"])
-                self.draw_grid()
-                self.draw_obstacles()
-                self.draw_powerups()
-                self.draw_food()
-                self.draw_snake()
-                self.draw_ai_snake()
-                self.draw_score()
-
                 if self.paused:
-                    self.draw_pause()
-                elif self.game_over:
-                    self.draw_game_over()
+                    self.renderer.render("pause")
+                elif self.engine.game_over:
+                    self.renderer.render("game_over")
                     self.save_record()
-
-                pygame.display.flip()
-                self.clock.tick(10)
-
+                    if self.autopilot is not None:
+                        self.restart_timer += elapsed
+                        if self.restart_timer >= SPECTATE_RESTART:
+                            self.reset_game()
+                else:
+                    self.renderer.render(alpha=alpha)
+                if profiler.enabled:
+                    profiler.lap("draw")
+                    profiler.end_frame(self.engine.ticks - ticks, self.tick_interval())
+
+        logging.getLogger(__name__).info("Cache de texto: %s", self.text_cache.cache_info())
+        if self.profile_path and self.profiler.frames:
+            try:
+                self.profiler.dump(self.profile_path)
+            except OSError as error:
+                logging.getLogger(__name__).warning("Não foi possível salvar as medições: %s", error)
         pygame.quit()
 
-    def get_ai_move(self):
-        if not self.ai_snake:
-            return "RIGHT"
+    def spectate(self, snakes=None):
+        # Arena sem jogador humano: a SearchAI conduz a cobra do jogador, a
+        # câmera a acompanha e cada partida recomeça sozinha
+        self.mode_name = "🏟️ Arena"
+        if self.board_name == "📐 40x30":
+            self.board_name = "🗺️ 200x150"
+        self.arena_snakes = snakes
+        self.autopilot = SearchAI().policy
+        self.reset_game()
+        self.run("game")
 
-        head = self.ai_snake[0]
-        possible_moves = []
-        
-        # Verifica movimentos possíveis
-        if head[0] > 0 and [head[0]-1, head[1]] not in self.ai_snake and [head[0]-1, head[1]] not in self.obstacles:
-            possible_moves.append(("UP", abs(head[0]-1 - self.food[0]) + abs(head[1] - self.food[1])))
-        if head[0] < GRID_HEIGHT-1 and [head[0]+1, head[1]] not in self.ai_snake and [head[0]+1, head[1]] not in self.obstacles:
-            possible_moves.append(("DOWN", abs(head[0]+1 - self.food[0]) + abs(head[1] - self.food[1])))
-        if head[1] > 0 and [head[0], head[1]-1] not in self.ai_snake and [head[0], head[1]-1] not in self.obstacles:
-            possible_moves.append(("LEFT", abs(head[0] - self.food[0]) + abs(head[1]-1 - self.food[1])))
-        if head[1] < GRID_WIDTH-1 and [head[0], head[1]+1] not in self.ai_snake and [head[0], head[1]+1] not in self.obstacles:
-            possible_moves.append(("RIGHT", abs(head[0] - self.food[0]) + abs(head[1]+1 - self.food[1])))
-        
-        if possible_moves:
-            return min(possible_moves, key=lambda x: x[1])[0]
-        return random.choice(["UP", "DOWN", "LEFT", "RIGHT"])
+    def get_ai_move(self):
+        return self.engine.get_ai_move()
+
+    def close(self):
+        # Espera a thread de fundo terminar a fila e grava o que ainda estiver
+        # pendente no placar (um flush descartado com a fila cheia, por exemplo)
+        if self.worker.close():
+            self.scores.flush()
+        else:
+            logging.getLogger(__name__).warning("A thread de fundo não terminou; placar pode não ter sido salvo")
+
+def main(argv=None):
+    # Uso: snake_gui.py [--headless] [--startup-time] [--profile[=ARQUIVO]]
+    #                   [tournament ... | replay ARQUIVO [velocidade] | spectate [cobras] |
+    #                    connect [HOST:PORTA]]
+    argv = sys.argv[1:] if argv is None else list(argv)
+    headless = "--headless" in argv
+    startup_time = "--startup-time" in argv
+    profile = [arg for arg in argv if arg == "--profile" or arg.startswith("--profile=")]
+    argv = [arg for arg in argv if arg not in ("--headless", "--startup-time") and arg not in profile]
+
+    if argv and argv[0] == "tournament":
+        from snake_tournament import main as tournament_main
+        tournament_main(argv[1:])
+        return
+
+    game = SnakeGame(headless)
+    route_logging(game.worker)
+    if profile:
+        game.profile_path = profile[-1].partition("=")[2] or PROFILE_FILE
+        game.set_profiling(True)
+    try:
+        if startup_time:
+            print(f"Inicialização: {(time.perf_counter() - _STARTUP) * 1000:.1f} ms")
+            pygame.quit()
+        elif len(argv) > 1 and argv[0] == "replay":
+            game.play_replay(argv[1], float(argv[2]) if len(argv) > 2 else 1.0)
+        elif argv and argv[0] == "spectate":
+            game.spectate(int(argv[1]) if len(argv) > 1 else None)
+        elif argv and argv[0] == "connect":
+            game.play_remote(argv[1] if len(argv) > 1 else "")
+        else:
+            game.run()
+    finally:
+        game.close()
 
 if __name__ == "__main__":
-    game = SnakeGame()
-    game.run() 
\ No newline at end of file
+    main() 
\ No newline at end of file
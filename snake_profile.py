@@ -0,0 +1,156 @@
+import csv
+import json
+import time
+from array import array
+
+# Medição do tempo gasto em cada fase de um quadro do jogo. O laço marca as
+# fases de primeiro nível (eventos, simulação, desenho) com lap(); métodos
+# internos (get_ai_move, draw_*, envio para a tela) são medidos embrulhando-os
+# no próprio objeto enquanto o profiler está ligado. Desligado, não há
+# embrulho nenhum e o laço só testa profiler.enabled.
+#
+# Os totais de cada quadro vão para buffers circulares de tamanho fixo, um
+# por fase, em milissegundos.
+
+
+class FrameProfiler:
+    def __init__(self, size=600):
+        self.size = size
+        self.enabled = False
+        # Quadros medidos desde que o profiler foi criado
+        self.frames = 0
+        # Quadros cujo trabalho passou do intervalo entre ticks
+        self.over_budget = 0
+        self.wall_ms = array("d", [0.0]) * size
+        self.frame_ms = array("d", [0.0]) * size
+        self.ticks = array("i", [0]) * size
+        # fase -> ms por quadro; fases novas entram com zero nos quadros anteriores
+        self.samples = {}
+        self.current = {}
+        # nome do método -> objeto embrulhado
+        self._wrapped = {}
+        self._mark = 0.0
+        self._frame_start = None
+        self._work = 0.0
+
+    def enable(self, targets=()):
+        # targets: (objeto, nome do método, fase) a medir enquanto ligado
+        if not self.enabled:
+            self.enabled = True
+            self._frame_start = None
+            for obj, name, phase in targets:
+                self.wrap(obj, name, phase)
+
+    def disable(self):
+        self.enabled = False
+        for name, obj in self._wrapped.items():
+            # Remove o atributo da instância; volta a valer o método da classe
+            obj.__dict__.pop(name, None)
+        self._wrapped = {}
+
+    def wrap(self, obj, name, phase=None):
+        # Um objeto por nome de método: embrulhar outro (o engine novo depois
+        # de reset_game) desfaz o embrulho anterior e solta o objeto antigo
+        previous = self._wrapped.pop(name, None)
+        if previous is not None:
+            previous.__dict__.pop(name, None)
+        method = getattr(obj, name)
+        phase = phase or name
+        current = self.current
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                current[phase] = current.get(phase, 0.0) + perf_counter() - start
+
+        setattr(obj, name, timed)
+        self._wrapped[name] = obj
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.wall_ms[self.frames % self.size] = (now - self._frame_start) * 1000
+        self._frame_start = now
+        self._mark = now
+        self._work = 0.0
+        self.current.clear()
+
+    def lap(self, phase):
+        # Soma à fase o tempo desde a última marca; phase=None descarta esse
+        # tempo (a espera do clock.tick não é trabalho do quadro)
+        now = time.perf_counter()
+        if phase is not None:
+            elapsed = now - self._mark
+            self.current[phase] = self.current.get(phase, 0.0) + elapsed
+            self._work += elapsed
+        self._mark = now
+
+    def end_frame(self, ticks=0, budget_ms=None):
+        slot = self.frames % self.size
+        frame_ms = self._work * 1000
+        self.frame_ms[slot] = frame_ms
+        self.ticks[slot] = ticks
+        for phase in self.current:
+            if phase not in self.samples:
+                self.samples[phase] = array("d", [0.0]) * self.size
+        for phase, values in self.samples.items():
+            values[slot] = self.current.get(phase, 0.0) * 1000
+        if budget_ms is not None and frame_ms > budget_ms:
+            self.over_budget += 1
+        self.frames += 1
+
+    def _order(self):
+        # Posições dos quadros guardados, do mais antigo ao mais recente
+        count = min(self.frames, self.size)
+        return [(self.frames - count + i) % self.size for i in range(count)]
+
+    def stats(self):
+        # p50, p99 e máximo por fase (ms) sobre os quadros guardados
+        order = self._order()
+        wall = sum(self.wall_ms[i] for i in order)
+        ticks = sum(self.ticks[i] for i in order)
+        phases = {"frame": self.frame_ms}
+        phases.update(self.samples)
+        table = {}
+        for phase, values in phases.items():
+            ordered = sorted(values[i] for i in order)
+            if not ordered:
+                continue
+            table[phase] = {
+                "p50": ordered[len(ordered) // 2],
+                "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+                "max": ordered[-1]
+            }
+        return {
+            "frames": len(order),
+            "fps": len(order) * 1000 / wall if wall else 0.0,
+            "ticks_per_sec": ticks * 1000 / wall if wall else 0.0,
+            "over_budget": self.over_budget,
+            "phases": table
+        }
+
+    def rows(self):
+        phases = sorted(self.samples)
+        order = self._order()
+        first = self.frames - len(order)
+        for n, i in enumerate(order):
+            row = {"frame": first + n, "wall_ms": self.wall_ms[i],
+                   "frame_ms": self.frame_ms[i], "ticks": self.ticks[i]}
+            for phase in phases:
+                row[phase] = self.samples[phase][i]
+            yield row
+
+    def dump(self, path):
+        # .json: resumo e quadros; qualquer outra extensão: CSV, um quadro por linha
+        rows = list(self.rows())
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                json.dump({"stats": self.stats(), "frames": rows}, f, indent=1)
+            else:
+                fields = ["frame", "wall_ms", "frame_ms", "ticks"] + sorted(self.samples)
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
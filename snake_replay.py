@@ -0,0 +1,299 @@
+import json
+import sys
+import time
+
+from snake_engine import SnakeEngine, DIRECTIONS, TOPOLOGY_WALLED, TOPOLOGIES
+
+# Replays determinísticos. Uma partida é gravada como semente do RNG, modo e
+# configurações, mais a direção de cada tick: 2 bits por direção, em
+# sequências (run-length) codificadas como varint de (repetições << 2 | direção).
+# Como a cobra segue reto a maior parte do tempo, mesmo partidas longas
+# ocupam poucos KB. As jogadas da cobra da IA são gravadas num segundo fluxo,
+# porque a IA de busca depende de um orçamento de tempo e não é reprodutível.
+#
+# Formato: MAGIC, versão, varint + cabeçalho JSON, fluxo do jogador, fluxo da IA.
+
+MAGIC = b"SNKR"
+VERSION = 1
+
+CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+NAMES = list(DIRECTIONS)
+
+# Intervalo, em ticks, entre os estados guardados para busca rápida
+CHECKPOINT_INTERVAL = 500
+
+# Campos obrigatórios do cabeçalho e seus tipos; os opcionais (ai_count,
+# topology, obstacle_density) são de versões posteriores e têm padrão
+HEADER_FIELDS = {
+    "seed": int,
+    "mode": str,
+    "width": int,
+    "height": int,
+    "score_multiplier": int,
+    "ticks": int,
+    "score": int,
+    "ai_score": int,
+    "game_over": bool,
+}
+
+# Menor tabuleiro em que a cobra cabe com a borda em volta
+MIN_BOARD = 5
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def _write_varint(out, value):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("replay truncado")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_moves(codes):
+    out = bytearray()
+    runs = []
+    for code in codes:
+        if runs and runs[-1][0] == code:
+            runs[-1][1] += 1
+        else:
+            runs.append([code, 1])
+    _write_varint(out, len(runs))
+    for code, count in runs:
+        _write_varint(out, count << 2 | code)
+    return out
+
+
+def decode_moves(data, pos):
+    codes = bytearray()
+    runs, pos = _read_varint(data, pos)
+    for _ in range(runs):
+        value, pos = _read_varint(data, pos)
+        codes.extend(bytes([value & 3]) * (value >> 2))
+    return codes, pos
+
+
+def parse(data):
+    # Devolve (cabeçalho, jogadas do jogador, jogadas da IA)
+    if data[:4] != MAGIC:
+        raise ReplayError("não é um arquivo de replay")
+    if len(data) < 5:
+        raise ReplayError("replay truncado")
+    if data[4] != VERSION:
+        raise ReplayError(f"versão de replay não suportada: {data[4]}")
+    length, pos = _read_varint(data, 5)
+    try:
+        header = json.loads(bytes(data[pos:pos+length]).decode("utf-8"))
+    except ValueError as error:
+        raise ReplayError(f"cabeçalho do replay corrompido: {error}") from None
+    _check_header(header)
+    pos += length
+    moves, pos = decode_moves(data, pos)
+    ai_moves, pos = decode_moves(data, pos)
+    return header, moves, ai_moves
+
+
+def _check_header(header):
+    if not isinstance(header, dict):
+        raise ReplayError("cabeçalho do replay corrompido")
+    for name, kind in HEADER_FIELDS.items():
+        value = header.get(name)
+        # bool também é int; só game_over pode ser bool
+        if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+            raise ReplayError(f"campo inválido no cabeçalho do replay: {name}")
+    if header["width"] < MIN_BOARD or header["height"] < MIN_BOARD:
+        raise ReplayError("tabuleiro do replay pequeno demais")
+    ai_count = header.get("ai_count")
+    if ai_count is not None and (not isinstance(ai_count, int) or ai_count < 0):
+        raise ReplayError("campo inválido no cabeçalho do replay: ai_count")
+    if header.get("topology", TOPOLOGY_WALLED) not in TOPOLOGIES:
+        raise ReplayError("campo inválido no cabeçalho do replay: topology")
+    density = header.get("obstacle_density", 0)
+    if not isinstance(density, (int, float)) or not 0 <= density < 1:
+        raise ReplayError("campo inválido no cabeçalho do replay: obstacle_density")
+
+
+class ReplayRecorder:
+    # Grava a partida conduzida por um SnakeEngine já reiniciado com semente
+    def __init__(self, engine, **settings):
+        self.header = {
+            "seed": engine.seed,
+            "mode": engine.mode,
+            "width": engine.width,
+            "height": engine.height,
+            "score_multiplier": engine.score_multiplier,
+            "ai_count": engine.ai_count,
+            "topology": engine.topology,
+            "obstacle_density": engine.obstacle_density,
+        }
+        self.header.update(settings)
+        self.moves = bytearray()
+        self.ai_moves = bytearray()
+        self.engine = engine
+        self._ai = engine.ai
+        engine.ai = self._record_ai
+
+    @classmethod
+    def resume(cls, engine, data):
+        # Continua a gravação de uma partida salva no meio: data é o replay
+        # até o ponto em que engine foi salvo
+        recorder = cls(engine)
+        header, moves, ai_moves = parse(data)
+        recorder.header = header
+        recorder.moves = bytearray(moves)
+        recorder.ai_moves = bytearray(ai_moves)
+        return recorder
+
+    def _record_ai(self, engine, body, own_tag):
+        direction = self._ai(engine, body, own_tag)
+        self.ai_moves.append(CODES[direction])
+        return direction
+
+    def record(self):
+        # Chamado depois de cada engine.step()
+        self.moves.append(CODES[self.engine.direction])
+
+    def to_bytes(self):
+        header = dict(self.header)
+        header["ticks"] = self.engine.ticks
+        header["score"] = self.engine.score
+        header["ai_score"] = self.engine.ai_score
+        header["game_over"] = self.engine.game_over
+        encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        out = bytearray(MAGIC)
+        out.append(VERSION)
+        _write_varint(out, len(encoded))
+        out += encoded
+        out += encode_moves(self.moves)
+        out += encode_moves(self.ai_moves)
+        return bytes(out)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+
+class _RecordedAI:
+    # Devolve as jogadas gravadas da IA, na ordem em que foram feitas
+    def __init__(self, moves):
+        self.moves = moves
+        self.position = 0
+
+    def __call__(self, engine, body, own_tag):
+        if self.position >= len(self.moves):
+            raise ReplayError("fluxo da IA terminou antes do jogo")
+        direction = NAMES[self.moves[self.position]]
+        self.position += 1
+        return direction
+
+
+class ReplayPlayer:
+    def __init__(self, data):
+        self.header, self.moves, self.ai_moves = parse(data)
+        self.checkpoints = {}
+        self.reset()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    @property
+    def total_ticks(self):
+        return len(self.moves)
+
+    def reset(self):
+        header = self.header
+        self.ai = _RecordedAI(self.ai_moves)
+        self.engine = SnakeEngine(header["width"], header["height"], seed=header["seed"],
+                                  mode=header["mode"], ai=self.ai,
+                                  score_multiplier=header["score_multiplier"],
+                                  ai_count=header.get("ai_count"),
+                                  # Replays anteriores a estes campos: bordas com paredes e sem obstáculos
+                                  topology=header.get("topology", TOPOLOGY_WALLED),
+                                  obstacle_density=header.get("obstacle_density", 0))
+        self.checkpoints[0] = (self.engine.clone(), 0)
+        return self.engine
+
+    def step(self):
+        # Avança um tick; devolve os eventos, ou None no fim do replay
+        engine = self.engine
+        if engine.ticks >= len(self.moves) or engine.game_over:
+            return None
+        events = engine.step(NAMES[self.moves[engine.ticks]])
+        if engine.ticks % CHECKPOINT_INTERVAL == 0 and engine.ticks not in self.checkpoints:
+            self.checkpoints[engine.ticks] = (engine.clone(), self.ai.position)
+        return events
+
+    def run(self, until=None):
+        # Re-simula sem janela o mais rápido possível
+        until = len(self.moves) if until is None else until
+        while self.engine.ticks < until and self.step() is not None:
+            pass
+        return self.engine
+
+    def seek(self, tick):
+        # Volta ao estado guardado mais próximo antes de tick e avança dali
+        tick = max(0, min(tick, len(self.moves)))
+        start = max(t for t in self.checkpoints if t <= tick)
+        if not (start <= self.engine.ticks <= tick):
+            engine, ai_position = self.checkpoints[start]
+            self.engine = engine.clone()
+            self.engine.ai = self.ai
+            self.ai.position = ai_position
+        return self.run(tick)
+
+    def verify(self):
+        # Confere se a re-simulação chega ao mesmo resultado gravado
+        self.seek(0)
+        engine = self.run()
+        header = self.header
+        return (engine.ticks == header["ticks"] and engine.score == header["score"] and
+                engine.ai_score == header["ai_score"] and engine.game_over == header["game_over"])
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("uso: python snake_replay.py ARQUIVO.snkr [...]")
+        return 2
+    status = 0
+    for path in argv:
+        start = time.perf_counter()
+        try:
+            player = ReplayPlayer.load(path)
+            ok = player.verify()
+        except (OSError, ReplayError) as error:
+            print(f"{path}: erro: {error}")
+            status = 1
+            continue
+        elapsed = (time.perf_counter() - start) * 1000
+        header = player.header
+        print(f"{path}: {'OK' if ok else 'DIVERGENTE'} - {header['score']} pontos, "
+              f"{header['ticks']} ticks, verificado em {elapsed:.1f} ms")
+        if not ok:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
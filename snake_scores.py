@@ -0,0 +1,143 @@
+import heapq
+import os
+import threading
+import time
+
+# Placar persistente. Os resultados ficam num log de texto (uma linha por
+# partida: pontos, modo, dificuldade, horário) lido uma única vez na
+# inicialização. Em memória, cada placar guarda só os K melhores num heap
+# mínimo. Resultados novos se acumulam em memória e são gravados de uma vez
+# quando a partida termina; de tempos em tempos o log é reescrito só com os
+# K melhores de cada placar, num arquivo temporário trocado com os.replace().
+#
+# flush() pode rodar numa thread de fundo enquanto o jogo chama add(): o lock
+# protege só a memória (heaps e pendentes), nunca a escrita no disco.
+
+SCORES_FILE = "scores.log"
+
+# Arquivos das versões antigas, importados quando o log ainda não existe
+LEGACY_RECORD_FILE = "record.txt"
+LEGACY_RANKING_FILE = "ranking.txt"
+
+
+class ScoreStore:
+    def __init__(self, path=SCORES_FILE, top_k=10, compact_after=200,
+                 default_mode="classic", default_difficulty="🐍 Médio"):
+        self.path = path
+        self.top_k = top_k
+        # Quantas linhas o log pode acumular antes de ser compactado
+        self.compact_after = compact_after
+        self.default_mode = default_mode
+        self.default_difficulty = default_difficulty
+        # (modo, dificuldade) -> heap de (pontos, horário); None significa "todos"
+        self.boards = {}
+        self.pending = []
+        self.log_lines = 0
+        self.lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    entry = self._parse(line)
+                    if entry is not None:
+                        self._insert(*entry)
+                        self.log_lines += 1
+        except FileNotFoundError:
+            self._import_legacy()
+        except OSError:
+            pass
+        return self
+
+    def _parse(self, line):
+        parts = line.rstrip("\n").split("\t")
+        if len(parts) != 4:
+            return None
+        try:
+            return int(parts[0]), parts[1], parts[2], int(parts[3])
+        except ValueError:
+            return None
+
+    def _import_legacy(self):
+        scores = []
+        for path in (LEGACY_RECORD_FILE, LEGACY_RANKING_FILE):
+            try:
+                with open(path, "r") as f:
+                    scores.extend(int(line) for line in f.read().split() if line.isdigit())
+            except OSError:
+                pass
+        for score in scores:
+            self.add(score, self.default_mode, self.default_difficulty, when=0)
+        if scores:
+            self.compact()
+
+    def _insert(self, score, mode, difficulty, when):
+        for key in ((mode, difficulty), (mode, None), (None, None)):
+            heap = self.boards.setdefault(key, [])
+            if len(heap) < self.top_k:
+                heapq.heappush(heap, (score, when))
+            elif (score, when) > heap[0]:
+                heapq.heapreplace(heap, (score, when))
+
+    def add(self, score, mode, difficulty, when=None):
+        when = int(time.time()) if when is None else when
+        with self.lock:
+            self._insert(score, mode, difficulty, when)
+            self.pending.append(f"{score}\t{mode}\t{difficulty}\t{when}\n")
+
+    def top(self, mode=None, difficulty=None, n=None):
+        # Melhores pontuações do placar, da maior para a menor
+        with self.lock:
+            heap = list(self.boards.get((mode, difficulty), []))
+        return [score for score, _ in sorted(heap, reverse=True)[:n]]
+
+    def best(self):
+        scores = self.top(n=1)
+        return scores[0] if scores else 0
+
+    def flush(self):
+        # Grava de uma vez os resultados pendentes (chamado no fim da partida).
+        # Só uma thread por vez deve chamar flush() ou compact().
+        with self.lock:
+            pending = list(self.pending)
+            if not pending:
+                return
+            compact = self.log_lines + len(pending) > self.compact_after
+        if compact:
+            self.compact()
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(pending))
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError:
+            return
+        with self.lock:
+            # Resultados adicionados durante a escrita ficam para a próxima vez
+            self.log_lines += len(pending)
+            del self.pending[:len(pending)]
+
+    def compact(self):
+        # Reescreve o log só com os K melhores de cada (modo, dificuldade);
+        # isso já contém os K melhores por modo e no geral
+        lines = []
+        with self.lock:
+            written = len(self.pending)
+            for (mode, difficulty), heap in self.boards.items():
+                if mode is None or difficulty is None:
+                    continue
+                for score, when in sorted(heap, reverse=True):
+                    lines.append(f"{score}\t{mode}\t{difficulty}\t{when}\n")
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError:
+            return
+        with self.lock:
+            self.log_lines = len(lines)
+            del self.pending[:written]
@@ -0,0 +1,627 @@
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import sys
+import time
+import zlib
+from array import array
+from collections import deque
+
+from snake_engine import (SnakeEngine, OPPOSITE, CELL_EMPTY, CELL_AI, CELL_OBSTACLE, CELL_POWERUP,
+                          CELL_FOOD, CELL_SNAKE, EVENT_MOVE, EVENT_TAIL, EVENT_EAT, EVENT_FOOD,
+                          EVENT_POWERUP, EVENT_AI_MOVE, EVENT_AI_TAIL, EVENT_AI_EAT, EVENT_GAME_OVER,
+                          EVENT_ARENA_MOVE, EVENT_ARENA_TAIL, EVENT_ARENA_EAT, EVENT_ARENA_DEATH,
+                          EVENT_ARENA_SPAWN, EVENT_POWERUP_EXPIRE, EVENT_EFFECT, EVENT_EFFECT_END,
+                          POWERUP_EFFECTS, TOPOLOGY_WALLED, greedy_policy)
+from snake_replay import CODES, NAMES, ReplayError, _write_varint, _read_varint
+
+# Servidor multijogador: um SnakeEngine autoritativo avança num ritmo fixo
+# dentro do laço do asyncio e transmite, por TCP, o que mudou em cada tick.
+#
+# Cada mensagem é um frame: varint com o tamanho e o conteúdo, cujo primeiro
+# byte diz o tipo. Quem conecta recebe um retrato completo do estado
+# (comprimido com zlib) e, a partir daí, um delta por tick com os eventos de
+# step(): cabeça que avançou, cauda que saiu, comida nova, pontos. A mesma
+# sequência de bytes é escrita para todos os clientes. O cliente mantém um
+# espelho do motor e aplica os deltas com SnakeEngine.apply_events(); as
+# células que o espelho já conhece (caudas, corpos mortos) nem são enviadas.
+#
+# Os clientes mandam viradas; o primeiro que mandar uma conduz a cobra do
+# jogador, os demais só assistem. Sem ninguém no controle, a política do
+# servidor joga.
+
+PROTOCOL_VERSION = 2
+
+FRAME_SNAPSHOT = ord("S")
+FRAME_DELTA = ord("D")
+FRAME_TURN = ord("T")
+
+EVENT_CODES = {event: code for code, event in enumerate((
+    EVENT_MOVE, EVENT_TAIL, EVENT_EAT, EVENT_FOOD, EVENT_POWERUP, EVENT_AI_MOVE, EVENT_AI_TAIL,
+    EVENT_AI_EAT, EVENT_GAME_OVER, EVENT_ARENA_MOVE, EVENT_ARENA_TAIL, EVENT_ARENA_EAT,
+    EVENT_ARENA_DEATH, EVENT_ARENA_SPAWN, EVENT_POWERUP_EXPIRE, EVENT_EFFECT, EVENT_EFFECT_END))}
+EVENT_NAMES = list(EVENT_CODES)
+GAME_OVER_REASONS = ["wall", "self", "obstacle", "ai", "board_full"]
+
+# Formato do dado de cada evento no fio
+_CELL_EVENTS = {EVENT_MOVE, EVENT_EAT, EVENT_FOOD, EVENT_POWERUP, EVENT_AI_MOVE, EVENT_AI_EAT,
+                EVENT_POWERUP_EXPIRE}
+_SNAKE_CELL_EVENTS = {EVENT_ARENA_MOVE, EVENT_ARENA_EAT, EVENT_ARENA_SPAWN}
+_SNAKE_EVENTS = {EVENT_ARENA_TAIL, EVENT_ARENA_DEATH}
+# O dado é o efeito, enviado como posição em POWERUP_EFFECTS
+_EFFECT_EVENTS = {EVENT_EFFECT, EVENT_EFFECT_END}
+
+DEFAULT_PORT = 8765
+# Bytes ainda não enviados a partir dos quais um cliente deixa de receber
+# deltas; quando a fila esvazia, ele recebe um retrato novo
+MAX_CLIENT_BUFFER = 256 * 1024
+# Maior frame aceito de um cliente (só viradas)
+MAX_CLIENT_FRAME = 64
+# Viradas guardadas do condutor, como na fila do teclado do jogo
+MAX_QUEUED_TURNS = 3
+# Ticks atrasados que o servidor ainda tenta recuperar antes de desistir deles
+MAX_LATE_TICKS = 5
+# Conexões aguardando accept(); o padrão do asyncio (100) faz centenas de
+# espectadores chegando juntos esperarem retransmissões do SYN
+LISTEN_BACKLOG = 1024
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def frame(payload):
+    out = bytearray()
+    _write_varint(out, len(payload))
+    out += payload
+    return bytes(out)
+
+
+def split_frames(buffer):
+    # Tira do buffer os frames completos; o resto fica para a próxima leitura
+    frames = []
+    pos = 0
+    while pos < len(buffer):
+        try:
+            length, start = _read_varint(buffer, pos)
+        except ReplayError:
+            break
+        if start + length > len(buffer):
+            break
+        frames.append(bytes(buffer[start:start+length]))
+        pos = start + length
+    del buffer[:pos]
+    return frames
+
+
+async def read_frame(reader, limit=None):
+    length = 0
+    shift = 0
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+        shift += 7
+        if shift > 35:
+            raise ProtocolError("tamanho de frame inválido")
+    if limit is not None and length > limit:
+        raise ProtocolError(f"frame grande demais: {length} bytes")
+    return await reader.readexactly(length)
+
+
+def turn_frame(direction):
+    return frame(bytes([FRAME_TURN, CODES[direction]]))
+
+
+def _write_cells(out, cells):
+    _write_varint(out, len(cells))
+    for cell in cells:
+        _write_varint(out, cell)
+
+
+def _read_cells(data, pos):
+    count, pos = _read_varint(data, pos)
+    cells = []
+    for _ in range(count):
+        cell, pos = _read_varint(data, pos)
+        cells.append(cell)
+    return cells, pos
+
+
+def encode_snapshot(engine, tick_ms):
+    header = {
+        "version": PROTOCOL_VERSION,
+        "width": engine.width,
+        "height": engine.height,
+        "mode": engine.mode,
+        "topology": engine.topology,
+        "score_multiplier": engine.score_multiplier,
+        "ai_count": engine.ai_count,
+        "tick_ms": tick_ms,
+        "effects": list(engine.effects)
+    }
+    body = bytearray()
+    encoded = json.dumps(header).encode("utf-8")
+    _write_varint(body, len(encoded))
+    body += encoded
+    for value in (engine.ticks, engine.score, engine.ai_score):
+        _write_varint(body, value)
+    body.append(CODES[engine.direction])
+    body.append(engine.game_over)
+    grid = engine.grid
+    foods = engine.foods if engine.foods is not None else [engine.food]
+    _write_cells(body, [cell for cell in foods if cell is not None])
+    # Power-ups já cobertos por uma cobra continuam na lista do motor
+    _write_cells(body, [cell for cell in engine.powerups if grid[cell] == CELL_POWERUP])
+    _write_cells(body, engine.obstacles)
+    _write_cells(body, engine.snake)
+    body.append(engine.ai_snake is not None)
+    _write_cells(body, engine.ai_snake or ())
+    _write_varint(body, len(engine.ai_snakes))
+    for score, snake in zip(engine.ai_scores, engine.ai_snakes):
+        _write_varint(body, score)
+        _write_cells(body, snake)
+    return bytes([FRAME_SNAPSHOT]) + zlib.compress(body)
+
+
+def decode_snapshot(payload):
+    # Monta o espelho do motor a partir de um retrato; devolve (cabeçalho, motor)
+    try:
+        body = zlib.decompress(payload[1:])
+    except zlib.error as error:
+        raise ProtocolError(f"retrato corrompido: {error}") from None
+    length, pos = _read_varint(body, 0)
+    header = json.loads(body[pos:pos+length].decode("utf-8"))
+    pos += length
+    if header.get("version") != PROTOCOL_VERSION:
+        raise ProtocolError(f"versão de protocolo não suportada: {header.get('version')}")
+
+    # A topologia vem do construtor, com os portais já na grade
+    engine = SnakeEngine(header["width"], header["height"],
+                         score_multiplier=header["score_multiplier"],
+                         topology=header.get("topology", TOPOLOGY_WALLED))
+    # Esvazia o tabuleiro sorteado pelo construtor
+    for cell in (*engine.snake, engine.food):
+        if cell is not None:
+            engine.set_cell(cell, CELL_EMPTY)
+    engine.snake.clear()
+    engine.mode = header["mode"]
+    engine.ai_count = header["ai_count"]
+    engine.effects = dict.fromkeys(header["effects"])
+
+    engine.ticks, pos = _read_varint(body, pos)
+    engine.score, pos = _read_varint(body, pos)
+    engine.ai_score, pos = _read_varint(body, pos)
+    engine.direction = NAMES[body[pos]]
+    engine.game_over = bool(body[pos+1])
+    pos += 2
+    foods, pos = _read_cells(body, pos)
+    for cell in foods:
+        engine.set_cell(cell, CELL_FOOD)
+    engine.food = foods[0] if foods else None
+    cells, pos = _read_cells(body, pos)
+    engine.powerups = dict.fromkeys(cells)
+    for cell in cells:
+        engine.set_cell(cell, CELL_POWERUP)
+    engine.obstacles, pos = _read_cells(body, pos)
+    for cell in engine.obstacles:
+        engine.set_cell(cell, CELL_OBSTACLE)
+    cells, pos = _read_cells(body, pos)
+    engine.snake = deque(cells)
+    for cell in cells:
+        engine.set_cell(cell, CELL_SNAKE)
+    has_ai = body[pos]
+    cells, pos = _read_cells(body, pos + 1)
+    engine.ai_snake = deque(cells) if has_ai else None
+    for cell in cells:
+        engine.set_cell(cell, CELL_AI)
+
+    count, pos = _read_varint(body, pos)
+    if count:
+        engine.owner = array("i", [-1]) * (engine.width * engine.height)
+        engine.ai_targets = [None] * count
+    for snake in range(count):
+        score, pos = _read_varint(body, pos)
+        cells, pos = _read_cells(body, pos)
+        engine.ai_scores.append(score)
+        engine.ai_snakes.append(deque(cells))
+        for cell in cells:
+            engine.set_cell(cell, CELL_AI)
+            engine.owner[cell] = snake
+    return header, engine
+
+
+def encode_delta(engine, events):
+    out = bytearray([FRAME_DELTA])
+    _write_varint(out, engine.ticks)
+    out.append(CODES[engine.direction])
+    _write_varint(out, engine.score)
+    _write_varint(out, engine.ai_score)
+    for event, data in events:
+        out.append(EVENT_CODES[event])
+        if event in _CELL_EVENTS:
+            _write_varint(out, data)
+        elif event in _SNAKE_CELL_EVENTS:
+            _write_varint(out, data[0])
+            _write_varint(out, data[1])
+        elif event in _SNAKE_EVENTS:
+            _write_varint(out, data[0])
+        elif event in _EFFECT_EVENTS:
+            out.append(POWERUP_EFFECTS.index(data))
+        elif event == EVENT_GAME_OVER:
+            out.append(GAME_OVER_REASONS.index(data))
+    return bytes(out)
+
+
+def decode_delta(payload):
+    # Devolve (tick, direção, pontos, pontos da IA, eventos); os dados que o
+    # espelho deduz sozinho vêm como None
+    tick, pos = _read_varint(payload, 1)
+    direction = NAMES[payload[pos]]
+    score, pos = _read_varint(payload, pos + 1)
+    ai_score, pos = _read_varint(payload, pos)
+    events = []
+    while pos < len(payload):
+        event = EVENT_NAMES[payload[pos]]
+        pos += 1
+        if event in _CELL_EVENTS:
+            data, pos = _read_varint(payload, pos)
+        elif event in _SNAKE_CELL_EVENTS:
+            snake, pos = _read_varint(payload, pos)
+            cell, pos = _read_varint(payload, pos)
+            data = (snake, cell)
+        elif event in _SNAKE_EVENTS:
+            snake, pos = _read_varint(payload, pos)
+            data = (snake, None)
+        elif event in _EFFECT_EVENTS:
+            data = POWERUP_EFFECTS[payload[pos]]
+            pos += 1
+        elif event == EVENT_GAME_OVER:
+            data = GAME_OVER_REASONS[payload[pos]]
+            pos += 1
+        else:
+            data = None
+        events.append((event, data))
+    return tick, direction, score, ai_score, events
+
+
+class RemoteGame:
+    # Espelho do jogo do servidor, montado a partir dos frames recebidos
+    def __init__(self):
+        self.header = None
+        self.engine = None
+        self.frames = 0
+        self.bytes_received = 0
+
+    def feed(self, payload):
+        # Aplica um frame; devolve os eventos do tick, ou None para um retrato
+        # (o estado inteiro mudou e a tela deve ser refeita)
+        self.frames += 1
+        self.bytes_received += len(payload)
+        try:
+            kind = payload[0]
+            if kind == FRAME_SNAPSHOT:
+                self.header, self.engine = decode_snapshot(payload)
+                return None
+            if kind != FRAME_DELTA:
+                raise ProtocolError(f"frame desconhecido: {kind}")
+            if self.engine is None:
+                raise ProtocolError("delta antes do primeiro retrato")
+            tick, direction, score, ai_score, events = decode_delta(payload)
+        except (IndexError, ReplayError, UnicodeDecodeError, json.JSONDecodeError) as error:
+            raise ProtocolError(f"frame inválido: {error}") from None
+        engine = self.engine
+        events = engine.apply_events(events)
+        engine.ticks = tick
+        engine.direction = direction
+        engine.score = score
+        engine.ai_score = ai_score
+        return events
+
+
+class _Client:
+    def __init__(self, writer):
+        self.writer = writer
+        # Ficou para trás: recebe um retrato em vez do próximo delta
+        self.stale = False
+
+    @property
+    def peer(self):
+        return self.writer.get_extra_info("peername")
+
+
+class GameServer:
+    def __init__(self, engine, tick_ms=100, policy=None, restart_ms=2000):
+        self.engine = engine
+        self.tick_ms = tick_ms
+        # policy(engine) conduz a cobra do jogador enquanto nenhum cliente a conduz
+        self.policy = policy
+        # Depois de um fim de jogo, o servidor espera esse tempo e recomeça
+        self.restart_ms = restart_ms
+        self.clients = set()
+        self.pilot = None
+        self.turns = deque()
+        self.server = None
+        self.ticks = 0
+        self.bytes_sent = 0
+        self.tick_times = deque(maxlen=1000)
+        self._snapshot = None
+        self._snapshot_key = None
+        self._over_ticks = 0
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self._serve_client, host, port,
+                                                 backlog=LISTEN_BACKLOG)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        for client in list(self.clients):
+            client.writer.close()
+        self.clients.clear()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def snapshot(self):
+        # O mesmo retrato serve para todos que precisarem dele neste tick
+        key = (self.engine.generation, self.engine.ticks, self.engine.game_over)
+        if key != self._snapshot_key:
+            self._snapshot = frame(encode_snapshot(self.engine, self.tick_ms))
+            self._snapshot_key = key
+        return self._snapshot
+
+    async def run(self, ticks=None):
+        # Passo fixo pelo relógio do laço; atrasos pequenos são recuperados
+        # com ticks seguidos, atrasos grandes são descartados
+        loop = asyncio.get_running_loop()
+        interval = self.tick_ms / 1000
+        next_tick = loop.time()
+        done = 0
+        while ticks is None or done < ticks:
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay < -MAX_LATE_TICKS * interval:
+                next_tick = loop.time()
+            await asyncio.sleep(max(0.0, delay))
+            self.tick()
+            done += 1
+
+    def tick(self):
+        start = time.perf_counter()
+        engine = self.engine
+        self.ticks += 1
+        if engine.game_over:
+            self._over_ticks += 1
+            if self._over_ticks * self.tick_ms < self.restart_ms:
+                return
+            self._restart()
+        else:
+            if self.turns:
+                direction = self.turns.popleft()
+            elif self.pilot is None and self.policy is not None:
+                direction = self.policy(engine)
+            else:
+                direction = None
+            self.broadcast(frame(encode_delta(engine, engine.step(direction))))
+        self.tick_times.append(time.perf_counter() - start)
+
+    def _restart(self):
+        engine = self.engine
+        engine.reset(None if engine.seed is None else engine.seed + 1)
+        self.turns.clear()
+        self._over_ticks = 0
+        for client in self.clients:
+            client.stale = True
+        self.broadcast(None)
+        logging.getLogger(__name__).info("Nova partida, semente %s, %d clientes",
+                                         engine.seed, len(self.clients))
+
+    def broadcast(self, data):
+        # data=None manda só os retratos pendentes
+        for client in list(self.clients):
+            transport = client.writer.transport
+            if transport.is_closing():
+                self._drop(client)
+            elif transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                client.stale = True
+            elif client.stale:
+                client.stale = False
+                self._send(client, self.snapshot())
+            elif data is not None:
+                self._send(client, data)
+
+    def _send(self, client, data):
+        client.writer.write(data)
+        self.bytes_sent += len(data)
+
+    def _drop(self, client):
+        self.clients.discard(client)
+        if client is self.pilot:
+            self.pilot = None
+            self.turns.clear()
+
+    def queue_turn(self, direction):
+        # Mesma regra da fila do teclado: compara com a última virada guardada
+        last = self.turns[-1] if self.turns else self.engine.direction
+        if direction != last and direction != OPPOSITE[last] and len(self.turns) < MAX_QUEUED_TURNS:
+            self.turns.append(direction)
+
+    async def _serve_client(self, reader, writer):
+        client = _Client(writer)
+        self._send(client, self.snapshot())
+        self.clients.add(client)
+        log = logging.getLogger(__name__)
+        log.debug("Cliente conectado: %s", client.peer)
+        try:
+            while True:
+                payload = await read_frame(reader, MAX_CLIENT_FRAME)
+                if len(payload) != 2 or payload[0] != FRAME_TURN or payload[1] >= len(NAMES):
+                    raise ProtocolError("frame inválido do cliente")
+                if self.pilot is None:
+                    self.pilot = client
+                if client is self.pilot:
+                    self.queue_turn(NAMES[payload[1]])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ProtocolError as error:
+            log.warning("Cliente %s desconectado: %s", client.peer, error)
+        finally:
+            self._drop(client)
+            writer.close()
+
+
+class ServerConnection:
+    # Lado cliente sem asyncio, para o laço do pygame: lê o que chegou sem
+    # bloquear a cada quadro e mantém um RemoteGame atualizado
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, timeout=5.0):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.game = RemoteGame()
+        self.buffer = bytearray()
+        self.closed = False
+        # O primeiro retrato é esperado com o socket ainda bloqueante
+        while self.game.engine is None and not self.closed:
+            self._receive()
+            for payload in split_frames(self.buffer):
+                self.game.feed(payload)
+        self.sock.setblocking(False)
+
+    def _receive(self):
+        try:
+            data = self.sock.recv(65536)
+        except (BlockingIOError, socket.timeout):
+            return False
+        if not data:
+            self.closed = True
+            return False
+        self.buffer += data
+        return True
+
+    def poll(self):
+        # Eventos de cada frame recebido desde a última chamada (None para
+        # retratos). Cada frame só é aplicado ao espelho quando o anterior já
+        # foi consumido, para que quem desenha veja o estado daquele tick.
+        while not self.closed and self._receive():
+            pass
+        for payload in split_frames(self.buffer):
+            yield self.game.feed(payload)
+
+    def send_turn(self, direction):
+        try:
+            self.sock.send(turn_frame(direction))
+        except (BlockingIOError, OSError):
+            pass
+
+    def close(self):
+        self.sock.close()
+
+
+async def _follow(host, port, game, pilot=False):
+    # Cliente de teste: acompanha o servidor até a conexão fechar; o condutor
+    # decide as viradas com a IA gulosa rodando sobre o próprio espelho
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            events = game.feed(await read_frame(reader))
+            if pilot and events is not None and not game.engine.game_over:
+                writer.write(turn_frame(greedy_policy(game.engine)))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def _same_state(mirror, engine):
+    return (mirror.grid == engine.grid and list(mirror.snake) == list(engine.snake) and
+            mirror.ticks == engine.ticks and mirror.score == engine.score and
+            mirror.ai_score == engine.ai_score and mirror.game_over == engine.game_over and
+            list(mirror.effects) == list(engine.effects) and
+            [list(body) for body in mirror.ai_snakes] == [list(body) for body in engine.ai_snakes] and
+            mirror.owner == engine.owner)
+
+
+async def loopback_check(spectators=200, ticks=200, tick_ms=10, pilot=True, **engine_options):
+    # Servidor e clientes roteirizados no mesmo processo, por 127.0.0.1. No
+    # fim, cada espelho precisa ser idêntico ao motor do servidor.
+    from snake_ai import SearchAI
+
+    engine = SnakeEngine(**engine_options)
+    server = GameServer(engine, tick_ms=tick_ms, policy=SearchAI().policy)
+    host, port = await server.start("127.0.0.1", 0)
+    games = [RemoteGame() for _ in range(spectators)]
+    tasks = [asyncio.create_task(_follow(host, port, game, pilot and i == 0))
+             for i, game in enumerate(games)]
+    while len(server.clients) < spectators:
+        await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await server.run(ticks)
+    elapsed = time.perf_counter() - start
+    await server.close()
+    await asyncio.gather(*tasks)
+    times = sorted(server.tick_times)
+    return {
+        "spectators": spectators,
+        "ticks": server.ticks,
+        "elapsed": elapsed,
+        "mismatches": sum(not _same_state(game.engine, engine) for game in games),
+        "bytes_per_client_tick": sum(game.bytes_received for game in games) / spectators / server.ticks,
+        "tick_p50_ms": times[len(times) // 2] * 1000,
+        "tick_p99_ms": times[min(len(times) - 1, int(len(times) * 0.99))] * 1000
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="snake_server.py",
+                                     description="Servidor multijogador do Snake Game")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--width", type=int, default=40)
+    parser.add_argument("--height", type=int, default=30)
+    parser.add_argument("--mode", default="classic")
+    parser.add_argument("--snakes", type=int, default=None, help="cobras da arena")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--tick-ms", type=int, default=100, help="intervalo entre ticks")
+    parser.add_argument("--no-autopilot", action="store_true",
+                        help="sem condutor, a cobra do jogador segue reto")
+    parser.add_argument("--loopback", type=int, metavar="CLIENTES",
+                        help="testa servidor e clientes roteirizados por 127.0.0.1 e sai")
+    parser.add_argument("--ticks", type=int, default=200, help="ticks do teste --loopback")
+    args = parser.parse_args(argv)
+    engine_options = {"width": args.width, "height": args.height, "mode": args.mode,
+                      "seed": args.seed, "ai_count": args.snakes}
+
+    if args.loopback:
+        result = asyncio.run(loopback_check(args.loopback, args.ticks, **engine_options))
+        print(f"{result['spectators']} clientes, {result['ticks']} ticks em {result['elapsed']:.2f}s: "
+              f"{result['mismatches']} espelhos divergentes, "
+              f"{result['bytes_per_client_tick']:.1f} bytes/tick por cliente, "
+              f"tick p50 {result['tick_p50_ms']:.2f} ms, p99 {result['tick_p99_ms']:.2f} ms")
+        return 1 if result["mismatches"] else 0
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    policy = None
+    if not args.no_autopilot:
+        from snake_ai import SearchAI
+        policy = SearchAI().policy
+
+    async def serve():
+        server = GameServer(SnakeEngine(**engine_options), args.tick_ms, policy)
+        host, port = await server.start(args.host, args.port)
+        logging.getLogger(__name__).info("Servidor em %s:%d", host, port)
+        try:
+            await server.run()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
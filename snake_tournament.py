@@ -0,0 +1,174 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from snake_engine import SnakeEngine, DIRECTIONS, CELL_SNAKE, greedy_ai
+from snake_ai import SearchAI
+
+# Torneio de IAs: jogos sem janela com sementes fixas, distribuídos entre
+# processos (um por núcleo). Os resultados chegam aos poucos e são agregados
+# por política.
+
+
+def random_ai(engine, body, own_tag):
+    return engine.rng.choice(list(DIRECTIONS))
+
+
+# As políticas são criadas dentro de cada processo a partir do nome, já que
+# a SearchAI guarda caches e não deve ser compartilhada entre jogos paralelos
+POLICIES = {
+    "greedy": lambda: greedy_ai,
+    "search": SearchAI,
+    "random": lambda: random_ai,
+}
+
+
+def play_games(player, opponent, seeds, max_ticks, width, height):
+    # Executado nos processos do pool; devolve um resultado por semente
+    player_ai = POLICIES[player]()
+    opponent_ai = POLICIES[opponent]() if opponent else None
+    mode = "ai" if opponent else "classic"
+    engine = SnakeEngine(width, height, mode=mode, ai=opponent_ai)
+    results = []
+    for seed in seeds:
+        engine.reset(seed)
+        start = time.perf_counter()
+        while not engine.game_over and engine.ticks < max_ticks:
+            engine.step(player_ai(engine, engine.snake, CELL_SNAKE))
+        elapsed = time.perf_counter() - start
+        results.append({
+            "seed": seed,
+            "player": player,
+            "opponent": opponent,
+            "score": engine.score,
+            "opponent_score": engine.ai_score,
+            "length": len(engine.snake),
+            "opponent_length": len(engine.ai_snake) if engine.ai_snake else 0,
+            "ticks": engine.ticks,
+            "elapsed": elapsed
+        })
+    return results
+
+
+class Standings:
+    def __init__(self):
+        self.rows = {}
+
+    def _row(self, policy):
+        return self.rows.setdefault(policy, {
+            "games": 0, "matches": 0, "wins": 0, "draws": 0, "score": 0,
+            "length": 0, "ticks": 0,
+            # Só os jogos em que a política foi o jogador, que é o tempo medido
+            "player_ticks": 0, "elapsed": 0.0
+        })
+
+    def add(self, result):
+        row = self._row(result["player"])
+        row["games"] += 1
+        row["score"] += result["score"]
+        row["length"] += result["length"]
+        row["ticks"] += result["ticks"]
+        row["player_ticks"] += result["ticks"]
+        row["elapsed"] += result["elapsed"]
+        if result["opponent"]:
+            other = self._row(result["opponent"])
+            other["games"] += 1
+            other["score"] += result["opponent_score"]
+            other["length"] += result["opponent_length"]
+            other["ticks"] += result["ticks"]
+            row["matches"] += 1
+            other["matches"] += 1
+            if result["score"] > result["opponent_score"]:
+                row["wins"] += 1
+            elif result["score"] < result["opponent_score"]:
+                other["wins"] += 1
+            else:
+                row["draws"] += 1
+                other["draws"] += 1
+
+    def summary(self):
+        table = {}
+        for policy, row in sorted(self.rows.items()):
+            games = max(row["games"], 1)
+            table[policy] = {
+                "games": row["games"],
+                "win_rate": row["wins"] / row["matches"] if row["matches"] else None,
+                "avg_score": row["score"] / games,
+                "avg_length": row["length"] / games,
+                "avg_ticks": row["ticks"] / games,
+                "moves_per_sec": row["player_ticks"] / row["elapsed"] if row["elapsed"] else 0.0
+            }
+        return table
+
+
+def matchups(policies, versus):
+    if versus:
+        return list(itertools.permutations(policies, 2))
+    return [(policy, None) for policy in policies]
+
+
+def run_tournament(policies, games, workers=None, versus=False, max_ticks=5000,
+                   width=40, height=30, first_seed=0, on_result=None):
+    workers = workers or os.cpu_count() or 1
+    seeds = list(range(first_seed, first_seed + games))
+    pairs = matchups(policies, versus)
+    # Lotes pequenos o bastante para equilibrar os processos e devolver
+    # resultados cedo, grandes o bastante para diluir o custo de cada tarefa
+    chunk = max(1, games * len(pairs) // (workers * 8))
+    standings = Standings()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(play_games, player, opponent, seeds[i:i+chunk], max_ticks, width, height)
+            for player, opponent in pairs
+            for i in range(0, len(seeds), chunk)
+        ]
+        for future in as_completed(futures):
+            for result in future.result():
+                standings.add(result)
+                if on_result:
+                    on_result(result, standings)
+    return standings.summary()
+
+
+def print_summary(summary):
+    print(f"{'política':<10} {'jogos':>7} {'vitórias':>9} {'pontos':>8} "
+          f"{'tamanho':>8} {'ticks':>8} {'jogadas/s':>11}")
+    for policy, row in summary.items():
+        win_rate = "-" if row["win_rate"] is None else f"{row['win_rate']:.1%}"
+        print(f"{policy:<10} {row['games']:>7} {win_rate:>9} {row['avg_score']:>8.1f} "
+              f"{row['avg_length']:>8.1f} {row['avg_ticks']:>8.0f} {row['moves_per_sec']:>11,.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="snake_gui.py tournament",
+                                     description="Torneio de IAs em jogos sem janela")
+    parser.add_argument("policies", nargs="*", default=["greedy", "search"], choices=list(POLICIES))
+    parser.add_argument("--games", type=int, default=1000, help="jogos por confronto")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: um por núcleo)")
+    parser.add_argument("--versus", action="store_true", help="políticas jogam umas contra as outras")
+    parser.add_argument("--max-ticks", type=int, default=5000)
+    parser.add_argument("--width", type=int, default=40)
+    parser.add_argument("--height", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0, help="primeira semente")
+    args = parser.parse_args(argv)
+
+    total = args.games * len(matchups(args.policies, args.versus))
+    done = 0
+    start = time.perf_counter()
+
+    def progress(result, standings):
+        nonlocal done
+        done += 1
+        if done % max(1, total // 20) == 0 or done == total:
+            print(f"[{done:>{len(str(total))}}/{total}] {time.perf_counter() - start:6.1f}s", flush=True)
+
+    summary = run_tournament(args.policies, args.games, args.workers, args.versus, args.max_ticks,
+                             args.width, args.height, args.seed, on_result=progress)
+    print_summary(summary)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import numpy as np
+
+from snake_engine import (GRID_WIDTH, GRID_HEIGHT, DIRECTIONS, OPPOSITE,
+                          CELL_EMPTY, CELL_SNAKE, CELL_OBSTACLE, CELL_FOOD)
+
+# Ambiente vetorizado para treino de bots: B tabuleiros independentes avançam
+# juntos em uma única chamada de step(), com as mesmas regras do SnakeEngine
+# (bordas matam, entrar no próprio corpo mata, comida nasce fora da borda).
+# Power-ups não alteram as regras e por isso não são gerados aqui.
+#
+# Cada corpo é um buffer circular de células compactadas: a cabeça está em
+# body[b, head_ptr[b]] e a cauda length[b]-1 posições antes.
+
+# Ações são índices na ordem de DIRECTIONS: 0=UP, 1=DOWN, 2=LEFT, 3=RIGHT.
+# Qualquer valor negativo mantém a direção atual.
+ACTIONS = list(DIRECTIONS)
+_DY = np.array([DIRECTIONS[d][0] for d in ACTIONS], dtype=np.int64)
+_DX = np.array([DIRECTIONS[d][1] for d in ACTIONS], dtype=np.int64)
+_OPPOSITE = np.array([ACTIONS.index(OPPOSITE[d]) for d in ACTIONS], dtype=np.int64)
+
+# Tentativas de sorteio vetorizado antes de varrer o tabuleiro inteiro
+_SPAWN_TRIES = 4
+
+
+class VecSnakeEnv:
+    def __init__(self, num_envs, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None):
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.num_cells = width * height
+        self.rng = np.random.default_rng(seed)
+        self._rows = np.arange(num_envs)
+
+        # Células onde a comida pode nascer (todas menos a borda)
+        spawn = np.zeros((height, width), dtype=bool)
+        spawn[1:-1, 1:-1] = True
+        self.spawn_cells = np.flatnonzero(spawn)
+        self.start_cell = (height // 2) * width + width // 2
+
+        self.grid = np.zeros((num_envs, self.num_cells), dtype=np.uint8)
+        self.body = np.zeros((num_envs, self.num_cells), dtype=np.int64)
+        self.head_ptr = np.zeros(num_envs, dtype=np.int64)
+        self.length = np.zeros(num_envs, dtype=np.int64)
+        self.direction = np.zeros(num_envs, dtype=np.int64)
+        self.food = np.zeros(num_envs, dtype=np.int64)
+        self.scores = np.zeros(num_envs, dtype=np.int64)
+        self.ticks = np.zeros(num_envs, dtype=np.int64)
+        self.reset()
+
+    def observations(self):
+        # Visão (B, altura, largura) da grade de ocupação, sem cópia
+        return self.grid.reshape(self.num_envs, self.height, self.width)
+
+    def reset(self, mask=None):
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        boards = np.flatnonzero(mask)
+        if boards.size == 0:
+            return self.observations()
+        self.grid[boards] = CELL_EMPTY
+        self.head_ptr[boards] = 0
+        self.length[boards] = 1
+        self.body[boards, 0] = self.start_cell
+        self.grid[boards, self.start_cell] = CELL_SNAKE
+        self.direction[boards] = ACTIONS.index("RIGHT")
+        self.scores[boards] = 0
+        self.ticks[boards] = 0
+        self._spawn_food(boards)
+        return self.observations()
+
+    def _spawn_food(self, boards):
+        # Devolve os tabuleiros onde não sobrou célula livre
+        pending = boards
+        for _ in range(_SPAWN_TRIES):
+            if pending.size == 0:
+                return pending
+            cells = self.spawn_cells[self.rng.integers(0, self.spawn_cells.size, pending.size)]
+            free = self.grid[pending, cells] == CELL_EMPTY
+            self.food[pending[free]] = cells[free]
+            self.grid[pending[free], cells[free]] = CELL_FOOD
+            pending = pending[~free]
+
+        # Tabuleiros quase cheios: sorteia entre as células livres restantes
+        full = []
+        for b in pending:
+            free_cells = self.spawn_cells[self.grid[b, self.spawn_cells] == CELL_EMPTY]
+            if free_cells.size == 0:
+                full.append(b)
+                continue
+            cell = free_cells[self.rng.integers(free_cells.size)]
+            self.food[b] = cell
+            self.grid[b, cell] = CELL_FOOD
+        return np.array(full, dtype=np.int64)
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        rows = self._rows
+
+        # Ignora a inversão de sentido e ações negativas
+        turn = (actions >= 0) & (actions != _OPPOSITE[self.direction])
+        self.direction = np.where(turn, actions, self.direction)
+        self.ticks += 1
+
+        head = self.body[rows, self.head_ptr]
+        row = head // self.width + _DY[self.direction]
+        col = head % self.width + _DX[self.direction]
+        wall = (row < 0) | (row >= self.height) | (col < 0) | (col >= self.width)
+        new_head = np.where(wall, 0, row * self.width + col)
+
+        # Colisões são verificadas antes de a cauda andar, como no SnakeEngine
+        tag = self.grid[rows, new_head]
+        dead = wall | (tag == CELL_SNAKE) | (tag == CELL_OBSTACLE)
+        alive = ~dead
+        ate = alive & (tag == CELL_FOOD)
+
+        # Quem não comeu libera a cauda
+        movers = np.flatnonzero(alive & ~ate)
+        tail_ptr = (self.head_ptr[movers] - self.length[movers] + 1) % self.num_cells
+        self.grid[movers, self.body[movers, tail_ptr]] = CELL_EMPTY
+
+        # Avança a cabeça de todos que sobreviveram
+        survivors = np.flatnonzero(alive)
+        self.head_ptr[survivors] = (self.head_ptr[survivors] + 1) % self.num_cells
+        self.body[survivors, self.head_ptr[survivors]] = new_head[survivors]
+        self.grid[survivors, new_head[survivors]] = CELL_SNAKE
+
+        eaters = np.flatnonzero(ate)
+        self.length[eaters] += 1
+        self.scores[eaters] += 1
+        board_full = self._spawn_food(eaters)
+
+        rewards = ate.astype(np.float32)
+        rewards[dead] = -1.0
+        dones = dead.copy()
+        dones[board_full] = True
+
+        # Reinicia automaticamente os tabuleiros que terminaram
+        info = {"final_scores": self.scores[dones].copy(), "final_ticks": self.ticks[dones].copy()}
+        if dones.any():
+            self.reset(dones)
+        return self.observations(), rewards, dones, info
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    num_envs = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    env = VecSnakeEnv(num_envs, seed=0)
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, len(ACTIONS), (steps, num_envs))
+    start = time.perf_counter()
+    for t in range(steps):
+        env.step(actions[t])
+    elapsed = time.perf_counter() - start
+    print(f"{num_envs * steps / elapsed:,.0f} passos de tabuleiro por segundo "
+          f"({num_envs} tabuleiros, {steps} passos)")
@@ -0,0 +1,146 @@
+import logging
+import queue
+import sys
+import threading
+
+# Trabalho de E/S fora do laço do jogo. Uma única thread de fundo consome uma
+# fila limitada: gravação do placar e dos replays, notificações de recorde na
+# área de trabalho e as mensagens de log. O laço só enfileira com put_nowait;
+# se a fila estiver cheia a tarefa é descartada (e contada), nunca esperada.
+# Um disco lento ou um serviço de notificações travado atrasa só esta thread.
+
+QUEUE_SIZE = 64
+
+# Tempo (s) que close() espera a fila esvaziar ao sair do jogo
+CLOSE_TIMEOUT = 2.0
+
+NOTIFY_APP = "Jogo da Cobrinha"
+NOTIFY_TIMEOUT = 5
+
+
+class NullNotifier:
+    # Backend sem efeito (testes, --headless ou sem plyer): só guarda o que
+    # teria sido mostrado
+    def __init__(self):
+        self.sent = []
+
+    def notify(self, **kwargs):
+        self.sent.append(kwargs)
+
+
+def plyer_notifier():
+    # plyer é importado só quando a primeira notificação sai, já na thread de
+    # fundo; sem plyer ou sem backend para a plataforma, nada é mostrado
+    try:
+        from plyer import notification
+    except ImportError:
+        return NullNotifier()
+    return notification
+
+
+class BackgroundWorker:
+    def __init__(self, notifier=None, size=QUEUE_SIZE):
+        # notifier: objeto com notify(**kwargs); None usa o plyer
+        self.notifier = notifier
+        self.queue = queue.Queue(size)
+        # Tarefas descartadas com a fila cheia
+        self.dropped = 0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="snake-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, function, *args):
+        # Nunca bloqueia; devolve False se a tarefa foi descartada. Sem a
+        # thread (antes de start() ou depois de close()) a tarefa roda na hora.
+        if self._thread is None:
+            self._call(function, args)
+            return True
+        try:
+            self.queue.put_nowait((function, args))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def notify(self, title, message):
+        return self.submit(self._notify, title, message)
+
+    def _notify(self, title, message):
+        if self.notifier is None:
+            self.notifier = plyer_notifier()
+        try:
+            self.notifier.notify(title=title, message=message, app_name=NOTIFY_APP,
+                                 timeout=NOTIFY_TIMEOUT)
+        except NotImplementedError:
+            self.notifier = NullNotifier()
+
+    def _call(self, function, args):
+        try:
+            function(*args)
+        except Exception:
+            # Uma tarefa com erro não derruba a thread
+            logging.getLogger(__name__).exception("Tarefa de fundo falhou: %r", function)
+
+    def _run(self):
+        while True:
+            function, args = self.queue.get()
+            try:
+                if function is None:
+                    return
+                self._call(function, args)
+            finally:
+                self.queue.task_done()
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        # Termina o que já estava na fila (até timeout) e para a thread.
+        # Devolve False se a thread ainda estava ocupada quando o tempo acabou.
+        thread = self._thread
+        if thread is None:
+            return True
+        try:
+            self.queue.put((None, ()), timeout=timeout)
+        except queue.Full:
+            return False
+        thread.join(timeout)
+        if thread.is_alive():
+            return False
+        self._thread = None
+        return True
+
+
+class WorkerLogHandler(logging.Handler):
+    # Repassa cada registro de log para os handlers originais na thread de fundo
+    def __init__(self, worker, targets):
+        super().__init__()
+        self.worker = worker
+        self.targets = targets
+
+    def emit(self, record):
+        # A mensagem é montada aqui, antes que os argumentos mudem
+        record.msg = record.getMessage()
+        record.args = None
+        for target in self.targets:
+            if record.levelno >= target.level:
+                self.worker.submit(target.handle, record)
+
+
+def route_logging(worker, logger=None):
+    # Põe os handlers do logger (o raiz, por padrão) atrás da fila do worker.
+    # Sem handlers configurados, usa um para stderr como o lastResort do logging.
+    logger = logging.getLogger() if logger is None else logger
+    targets = []
+    for handler in logger.handlers:
+        targets.extend(handler.targets if isinstance(handler, WorkerLogHandler) else [handler])
+    if not targets:
+        fallback = logging.StreamHandler(sys.stderr)
+        fallback.setLevel(logging.WARNING)
+        targets = [fallback]
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+    handler = WorkerLogHandler(worker, targets)
+    logger.addHandler(handler)
+    return handler
@@ -0,0 +1,102 @@
+import pytest
+
+from snake_engine import (SnakeEngine, StateError, TOPOLOGIES, CELL_EMPTY, CELL_SNAKE, CELL_AI,
+                          CELL_FOOD, greedy_policy)
+
+MODES = ["classic", "ai", "competitive", "arena", "portal", "obstacles", "colorful", "precision"]
+
+
+def play(engine, ticks):
+    while not engine.game_over and engine.ticks < ticks:
+        engine.step(greedy_policy(engine))
+    return engine
+
+
+def check_invariants(engine):
+    width, height = engine.width, engine.height
+    grid = engine.grid
+    # Cada corpo ocupa exatamente as suas células, sem sobreposição
+    assert all(grid[cell] == CELL_SNAKE for cell in engine.snake)
+    assert grid.count(CELL_SNAKE) == len(set(engine.snake)) == len(engine.snake)
+    ai_bodies = [engine.ai_snake] if engine.ai_snake else engine.ai_snakes
+    ai_cells = [cell for body in ai_bodies for cell in body]
+    assert all(grid[cell] == CELL_AI for cell in ai_cells)
+    assert grid.count(CELL_AI) == len(set(ai_cells)) == len(ai_cells)
+    if engine.owner is not None:
+        for snake, body in enumerate(engine.ai_snakes):
+            assert all(engine.owner[cell] == snake for cell in body)
+    if engine.food is not None and engine.foods is None:
+        assert grid[engine.food] == CELL_FOOD
+    # _free tem exatamente as células internas vazias e _free_pos aponta para elas
+    free = set()
+    for cell in range(width * height):
+        row, col = divmod(cell, width)
+        pos = engine._free_pos[cell]
+        if row in (0, height - 1) or col in (0, width - 1):
+            assert pos == -2
+        elif grid[cell] == CELL_EMPTY:
+            assert engine._free[pos] == cell
+            free.add(cell)
+        else:
+            assert pos == -1
+    assert len(engine._free) == len(free)
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_invariants_after_steps(mode):
+    engine = SnakeEngine(40, 30, seed=7, mode=mode)
+    check_invariants(engine)
+    for _ in range(20):
+        play(engine, engine.ticks + 25)
+        check_invariants(engine)
+        if engine.game_over:
+            break
+
+
+@pytest.mark.parametrize("topology", TOPOLOGIES)
+def test_invariants_with_obstacles_on_every_topology(topology):
+    engine = SnakeEngine(30, 20, seed=3, mode="obstacles", topology=topology, obstacle_density=0.2)
+    check_invariants(engine)
+    play(engine, 300)
+    check_invariants(engine)
+
+
+def test_same_seed_same_game():
+    first = play(SnakeEngine(40, 30, seed=11, mode="ai"), 500)
+    second = play(SnakeEngine(40, 30, seed=11, mode="ai"), 500)
+    assert first.to_bytes() == second.to_bytes()
+
+
+@pytest.mark.parametrize("mode", ["classic", "ai", "arena", "obstacles"])
+def test_clone_is_independent(mode):
+    engine = play(SnakeEngine(40, 30, seed=5, mode=mode), 50)
+    before = engine.to_bytes()
+    copy = engine.clone()
+    play(copy, 150)
+    check_invariants(copy)
+    assert engine.to_bytes() == before
+    check_invariants(engine)
+    # A original continua igual à cópia tirada antes dela andar
+    assert play(engine, 150).to_bytes() == copy.to_bytes()
+
+
+@pytest.mark.parametrize("mode", ["classic", "ai", "arena", "portal", "obstacles"])
+def test_bytes_round_trip_continues_identically(mode):
+    engine = play(SnakeEngine(40, 30, seed=9, mode=mode), 80)
+    restored = SnakeEngine.from_bytes(engine.to_bytes())
+    assert restored.to_bytes() == engine.to_bytes()
+    check_invariants(restored)
+    assert play(restored, 300).to_bytes() == play(engine, 300).to_bytes()
+
+
+@pytest.mark.parametrize("data", [b"", b"SNKS", b"XXXX\x01abc", b"SNKS\xff", b"SNKS\x01not zlib"])
+def test_from_bytes_rejects_bad_headers(data):
+    with pytest.raises(StateError):
+        SnakeEngine.from_bytes(data)
+
+
+def test_from_bytes_rejects_truncated_state():
+    data = play(SnakeEngine(40, 30, seed=1), 40).to_bytes()
+    for length in range(len(data)):
+        with pytest.raises(StateError):
+            SnakeEngine.from_bytes(data[:length])
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from snake_engine import SnakeEngine, greedy_policy
+from snake_server import (RemoteGame, ProtocolError, encode_snapshot, encode_delta, loopback_check,
+                          _same_state)
+
+
+@pytest.mark.parametrize("mode", ["classic", "ai", "arena", "portal", "obstacles"])
+def test_deltas_keep_mirror_in_sync(mode):
+    engine = SnakeEngine(40, 30, seed=13, mode=mode)
+    mirror = RemoteGame()
+    assert mirror.feed(encode_snapshot(engine, 10)) is None
+    assert _same_state(mirror.engine, engine)
+    while not engine.game_over and engine.ticks < 800:
+        mirror.feed(encode_delta(engine, engine.step(greedy_policy(engine))))
+        assert _same_state(mirror.engine, engine)
+
+
+def test_snapshot_mid_game_resyncs():
+    engine = SnakeEngine(40, 30, seed=4, mode="ai")
+    while engine.ticks < 100:
+        engine.step(greedy_policy(engine))
+    mirror = RemoteGame()
+    mirror.feed(encode_snapshot(engine, 10))
+    for _ in range(100):
+        mirror.feed(encode_delta(engine, engine.step(greedy_policy(engine))))
+    assert _same_state(mirror.engine, engine)
+
+
+@pytest.mark.parametrize("payload", [b"\xff", b"\x02\x01", b""])
+def test_bad_frames_are_rejected(payload):
+    with pytest.raises(ProtocolError):
+        RemoteGame().feed(payload)
+
+
+def test_loopback_spectators_match_server():
+    result = asyncio.run(loopback_check(spectators=3, ticks=40, tick_ms=5))
+    assert result["mismatches"] == 0
@@ -0,0 +1,45 @@
+import pytest
+
+from snake_tournament import Standings, matchups, play_games
+
+
+def result(player, opponent, score, opponent_score, ticks, elapsed):
+    return {"seed": 0, "player": player, "opponent": opponent, "score": score,
+            "opponent_score": opponent_score, "length": 5, "opponent_length": 4 if opponent else 0,
+            "ticks": ticks, "elapsed": elapsed}
+
+
+def test_versus_moves_per_sec_counts_only_player_games():
+    standings = Standings()
+    standings.add(result("greedy", "random", 30, 10, 1000, 0.5))
+    standings.add(result("random", "greedy", 20, 20, 400, 0.1))
+    summary = standings.summary()
+    # Os ticks jogados como adversário não entram na conta de movimentos/s
+    assert summary["greedy"]["moves_per_sec"] == pytest.approx(1000 / 0.5)
+    assert summary["random"]["moves_per_sec"] == pytest.approx(400 / 0.1)
+    assert summary["greedy"]["games"] == summary["random"]["games"] == 2
+    assert summary["greedy"]["avg_ticks"] == summary["random"]["avg_ticks"] == 700
+    assert summary["greedy"]["win_rate"] == 0.5
+    assert summary["random"]["win_rate"] == 0.0
+
+
+def test_solo_games_have_no_win_rate():
+    standings = Standings()
+    standings.add(result("greedy", None, 30, 0, 200, 0.01))
+    summary = standings.summary()["greedy"]
+    assert summary["win_rate"] is None
+    assert summary["moves_per_sec"] == pytest.approx(200 / 0.01)
+
+
+def test_matchups():
+    assert matchups(["a", "b"], False) == [("a", None), ("b", None)]
+    assert matchups(["a", "b", "c"], True) == [("a", "b"), ("a", "c"), ("b", "a"),
+                                               ("b", "c"), ("c", "a"), ("c", "b")]
+
+
+def test_play_games_versus():
+    results = play_games("greedy", "random", [0, 1], 200, 20, 15)
+    assert [r["seed"] for r in results] == [0, 1]
+    for r in results:
+        assert r["player"] == "greedy" and r["opponent"] == "random"
+        assert 0 < r["ticks"] <= 200 and r["elapsed"] > 0